@@ -0,0 +1,92 @@
+"""
+Compare adaptive-DPI OCR against the fixed 300 DPI baseline.
+
+OCRs every page of the sample PDFs at 300 DPI, then again with a low-DPI
+first pass (re-reading low-confidence pages at 300) for each --low-dpi.
+Reports pages/sec, how many pages needed the full-DPI re-read, and how
+well the deed fields found by simple patterns (dates, parcel/tax IDs,
+instrument numbers, dollar amounts) agree with the baseline.
+
+    python benchmarks/bench_adaptive_dpi.py [--folder PATH] [--low-dpi 150 200] [--min-confidence 0.6]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.bench_rasterize import sample_pdfs
+from shared.ocr_pool import create_reader
+from shared.pdf_ocr import MIN_PAGE_CONFIDENCE, ocr_pdf_pages
+
+FIELD_PATTERNS = {
+    "date": re.compile(r'\b\d{1,2}/\d{1,2}/\d{2,4}\b'),
+    "parcel": re.compile(r'\b\d{3}[- ]?\d{2,3}[- ]?\d{3,4}(?:[- ]?\d{3})?\b'),
+    "instrument": re.compile(r'\b\d{8,14}\b'),
+    "amount": re.compile(r'\$\s?[\d,]+(?:\.\d{2})?'),
+}
+
+
+def extract_fields(text):
+    """Set of (field, normalized value) pairs found in a document's text"""
+    fields = set()
+    for name, pattern in FIELD_PATTERNS.items():
+        for match in pattern.findall(text):
+            fields.add((name, re.sub(r'[\s,$-]', '', match)))
+    return fields
+
+
+def ocr_documents(reader, pdfs, dpi, low_dpi=None, min_confidence=MIN_PAGE_CONFIDENCE):
+    """OCR every page of each PDF; returns (records per document, elapsed seconds)"""
+    import fitz  # PyMuPDF
+
+    documents = []
+    start = time.perf_counter()
+    for pdf in pdfs:
+        with fitz.open(str(pdf)) as doc:
+            page_indexes = list(range(doc.page_count))
+        documents.append(ocr_pdf_pages(str(pdf), page_indexes, reader, dpi, low_dpi=low_dpi,
+                                       min_confidence=min_confidence))
+    return documents, time.perf_counter() - start
+
+
+def field_agreement(baseline, candidate):
+    """Share of baseline fields also found by the candidate, over all documents"""
+    expected = found = 0
+    for base_records, records in zip(baseline, candidate):
+        base_fields = extract_fields('\n'.join(r["text"] for r in base_records))
+        fields = extract_fields('\n'.join(r["text"] for r in records))
+        expected += len(base_fields)
+        found += len(base_fields & fields)
+    return found / expected if expected else 1.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--folder", default=os.path.join(ROOT, "loudoun", "loudoun_pdf"))
+    parser.add_argument("--dpi", type=int, default=300)
+    parser.add_argument("--low-dpi", type=int, nargs="+", default=[150, 200])
+    parser.add_argument("--min-confidence", type=float, default=MIN_PAGE_CONFIDENCE)
+    args = parser.parse_args()
+
+    pdfs = sample_pdfs(args.folder)
+    reader = create_reader()
+    print(f"OCR'ing {len(pdfs)} PDFs from {args.folder}")
+
+    baseline, elapsed = ocr_documents(reader, pdfs, args.dpi)
+    pages = sum(len(records) for records in baseline)
+    print(f"{f'fixed {args.dpi} DPI':>16}: {pages / elapsed:.2f} pages/sec")
+
+    for low_dpi in args.low_dpi:
+        documents, elapsed = ocr_documents(reader, pdfs, args.dpi, low_dpi, args.min_confidence)
+        rescanned = sum(1 for records in documents for r in records if r.get("rescanned"))
+        print(f"{f'adaptive {low_dpi}/{args.dpi}':>16}: {pages / elapsed:.2f} pages/sec, "
+              f"{rescanned}/{pages} pages re-read, "
+              f"field agreement {field_agreement(baseline, documents):.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Compare OCR backends head to head on the sample PDFs.
+
+Each backend runs in its own subprocess over the same pages and reports
+pages/sec, peak RSS and field-level accuracy. Accuracy is measured
+against --truth (a JSON file of {pdf name: {field: value}}) when given,
+otherwise as agreement with the fields the first backend finds (dates,
+parcel/tax IDs, instrument numbers, amounts).
+
+    python benchmarks/bench_ocr_backends.py [--folder PATH] [--backends easyocr tesseract] [--truth FILE]
+"""
+import argparse
+import json
+import os
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.bench_adaptive_dpi import extract_fields
+from benchmarks.bench_rasterize import sample_pdfs
+from shared.ocr_backends import OCR_BACKENDS
+
+
+def run_backend(backend, folder, dpi, output_path):
+    """OCR every sample page with one backend, writing texts and measurements to output_path"""
+    from shared.ocr_pool import create_reader
+    from shared.pdf_ocr import iter_pdf_page_arrays, ocr_image_text
+
+    reader = create_reader(backend=backend)
+    texts = {}
+    pages = 0
+    start = time.perf_counter()
+    for pdf in sample_pdfs(folder):
+        page_texts = []
+        for _, _, img in iter_pdf_page_arrays(str(pdf), dpi):
+            page_texts.append(ocr_image_text(reader, img))
+            pages += 1
+        texts[pdf.name] = '\n'.join(page_texts)
+    elapsed = time.perf_counter() - start
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "backend": backend,
+            "pages": pages,
+            "pages_per_sec": round(pages / elapsed, 3) if elapsed else None,
+            # ru_maxrss is in KB on Linux
+            "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            "texts": texts,
+        }, f, ensure_ascii=False)
+
+
+def _normalize(value):
+    return re.sub(r'[^0-9a-z]', '', str(value).lower())
+
+
+def truth_accuracy(texts, truth):
+    """Share of ground-truth field values that appear in the OCR text of their document"""
+    expected = found = 0
+    for name, fields in truth.items():
+        text = _normalize(texts.get(name, ""))
+        for value in fields.values():
+            if _normalize(value):
+                expected += 1
+                found += _normalize(value) in text
+    return found / expected if expected else None
+
+
+def agreement(texts, reference):
+    """Share of the reference backend's pattern fields also found by this backend"""
+    expected = found = 0
+    for name, ref_text in reference.items():
+        ref_fields = extract_fields(ref_text)
+        expected += len(ref_fields)
+        found += len(ref_fields & extract_fields(texts.get(name, "")))
+    return found / expected if expected else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--folder", default=os.path.join(ROOT, "loudoun", "loudoun_pdf"))
+    parser.add_argument("--dpi", type=int, default=300)
+    parser.add_argument("--backends", nargs="+", choices=OCR_BACKENDS, default=list(OCR_BACKENDS))
+    parser.add_argument("--truth", help="JSON file of {pdf name: {field: value}}")
+    parser.add_argument("--run", choices=OCR_BACKENDS, help=argparse.SUPPRESS)
+    parser.add_argument("--output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_backend(args.run, args.folder, args.dpi, args.output)
+        return
+
+    truth = None
+    if args.truth:
+        with open(args.truth, encoding="utf-8") as f:
+            truth = json.load(f)
+
+    print(f"OCR'ing {len(sample_pdfs(args.folder))} PDFs from {args.folder} at {args.dpi} DPI")
+    reference = reference_name = None
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in args.backends:
+            output_path = os.path.join(tmp, f"{backend}.json")
+            # Separate processes so peak RSS and model load are measured per backend
+            run = subprocess.run([sys.executable, __file__, "--run", backend, "--folder", args.folder,
+                                  "--dpi", str(args.dpi), "--output", output_path], capture_output=True, text=True)
+            if run.returncode != 0:
+                print(f"{backend:>10}: failed\n{run.stderr}")
+                continue
+            with open(output_path, encoding="utf-8") as f:
+                r = json.load(f)
+            if truth is not None:
+                score = truth_accuracy(r["texts"], truth)
+                label = "field accuracy"
+            else:
+                if reference is None:
+                    reference, reference_name = r["texts"], backend
+                score = agreement(r["texts"], reference)
+                label = f"field agreement with {reference_name}"
+            print(f"{backend:>10}: {r['pages_per_sec']} pages/sec, peak RSS {r['peak_rss_mb']} MB, "
+                  f"{label} {'n/a' if score is None else f'{score:.1%}'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Compare per-page EasyOCR calls against the batched OCR path.
+
+Rasterizes the sample PDFs once, then OCRs the pages with the old
+one-readtext-per-page loop and with ocr_image_texts at several page and
+recognition batch sizes. Reports pages/sec and how many pages produced
+text identical to the per-page baseline.
+
+    python benchmarks/bench_ocr_batching.py [--folder PATH] [--page-batch 2 4] [--batch-size 16 32]
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.bench_rasterize import sample_pdfs
+from shared.ocr_pool import create_reader
+from shared.pdf_ocr import iter_pdf_page_arrays, ocr_image_texts
+
+
+def load_pages(folder, dpi):
+    """Rasterize every sample page up front so only OCR is timed"""
+    pages = []
+    for pdf in sample_pdfs(folder):
+        for _, _, img in iter_pdf_page_arrays(str(pdf), dpi):
+            pages.append(img.copy())
+    return pages
+
+
+def time_run(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--folder", default=os.path.join(ROOT, "loudoun", "loudoun_pdf"))
+    parser.add_argument("--dpi", type=int, default=300)
+    parser.add_argument("--page-batch", type=int, nargs="+", default=[2, 4])
+    parser.add_argument("--batch-size", type=int, nargs="+", default=[16, 32, 64])
+    args = parser.parse_args()
+
+    pages = load_pages(args.folder, args.dpi)
+    print(f"Loaded {len(pages)} pages from {args.folder} at {args.dpi} DPI")
+    reader = create_reader()
+
+    # Warm up so model loading and first-call allocation aren't timed
+    reader.readtext(pages[0])
+
+    baseline, elapsed = time_run(lambda: ['\n'.join(r[1] for r in reader.readtext(img)) for img in pages])
+    print(f"{'per-page readtext':>28}: {len(pages) / elapsed:.2f} pages/sec")
+
+    for page_batch in args.page_batch:
+        for batch_size in args.batch_size:
+            def batched():
+                texts = []
+                for start in range(0, len(pages), page_batch):
+                    texts.extend(ocr_image_texts(reader, pages[start:start + page_batch], batch_size))
+                return texts
+            texts, elapsed = time_run(batched)
+            same = sum(1 for a, b in zip(baseline, texts) if a == b)
+            print(f"{f'pages={page_batch} batch_size={batch_size}':>28}: {len(pages) / elapsed:.2f} pages/sec, "
+                  f"{same}/{len(pages)} pages identical to baseline")
+
+
+if __name__ == "__main__":
+    main()
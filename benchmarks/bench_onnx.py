@@ -0,0 +1,95 @@
+"""
+Check ONNX Runtime EasyOCR against PyTorch and measure its throughput.
+
+On the sample PDF pages this compares the PyTorch reader with the ONNX
+float32 and int8 paths:
+
+- detector parity: max absolute difference of the CRAFT score maps on
+  the same input tensor
+- text parity: pages with identical text, mean character similarity and
+  pattern-field agreement (dates, parcel IDs, instrument numbers, amounts)
+- throughput: pages/sec through readtext
+
+Exits with status 1 when a variant's mean similarity is under
+--min-similarity, so it can gate switching OCR_BACKEND=easyocr-onnx.
+
+    python benchmarks/bench_onnx.py [--folder PATH] [--pages 20] [--min-similarity 0.97]
+"""
+import argparse
+import difflib
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.bench_adaptive_dpi import extract_fields
+from benchmarks.bench_ocr_batching import load_pages
+from shared.ocr_backends import EasyOCRBackend, EasyOCROnnxBackend
+from shared.pdf_ocr import ocr_image_text
+
+
+def detector_input(img, canvas_size=2560, mag_ratio=1.0):
+    """The tensor EasyOCR feeds its detector for a page"""
+    import cv2
+    import torch
+    from easyocr.imgproc import normalizeMeanVariance, resize_aspect_ratio
+
+    resized, _, _ = resize_aspect_ratio(img, canvas_size, interpolation=cv2.INTER_LINEAR, mag_ratio=mag_ratio)
+    return torch.from_numpy(normalizeMeanVariance(resized)).permute(2, 0, 1).unsqueeze(0)
+
+
+def detector_max_diff(torch_backend, onnx_backend, img):
+    import torch
+
+    x = detector_input(img)
+    with torch.no_grad():
+        expected, _ = torch_backend.reader.detector(x)
+    actual, _ = onnx_backend.reader.detector(x)
+    return float((expected - actual).abs().max())
+
+
+def read_all(backend, pages):
+    start = time.perf_counter()
+    texts = [ocr_image_text(backend, img) for img in pages]
+    return texts, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--folder", default=os.path.join(ROOT, "loudoun", "loudoun_pdf"))
+    parser.add_argument("--dpi", type=int, default=300)
+    parser.add_argument("--pages", type=int, default=20, help="limit the number of sample pages")
+    parser.add_argument("--min-similarity", type=float, default=0.97)
+    args = parser.parse_args()
+
+    pages = load_pages(args.folder, args.dpi)[:args.pages]
+    print(f"Loaded {len(pages)} pages from {args.folder} at {args.dpi} DPI")
+
+    # The reader OCR_BACKEND=easyocr uses today is the baseline
+    torch_backend = EasyOCRBackend()
+    torch_backend.reader.readtext(pages[0])
+    baseline, elapsed = read_all(torch_backend, pages)
+    print(f"{'pytorch':>12}: {len(pages) / elapsed:.2f} pages/sec")
+    baseline_fields = [extract_fields(text) for text in baseline]
+
+    failed = False
+    for label, quantize in (("onnx fp32", False), ("onnx int8", True)):
+        backend = EasyOCROnnxBackend(quantize=quantize)
+        backend.readtext(pages[0])
+        texts, elapsed = read_all(backend, pages)
+        identical = sum(1 for a, b in zip(baseline, texts) if a == b)
+        similarity = sum(difflib.SequenceMatcher(None, a, b).ratio() for a, b in zip(baseline, texts)) / len(pages)
+        expected = sum(len(f) for f in baseline_fields)
+        found = sum(len(f & extract_fields(text)) for f, text in zip(baseline_fields, texts))
+        diff = detector_max_diff(torch_backend, backend, pages[0])
+        print(f"{label:>12}: {len(pages) / elapsed:.2f} pages/sec, {identical}/{len(pages)} pages identical, "
+              f"similarity {similarity:.3f}, fields {found}/{expected}, detector max diff {diff:.4f}")
+        failed |= similarity < args.min_similarity
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
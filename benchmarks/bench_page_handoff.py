@@ -0,0 +1,87 @@
+"""
+Measure the cost of handing a page image to another process.
+
+Compares pickling the array through a multiprocessing Pipe with passing a
+shared-memory descriptor from shared.shm_pages (the OCR service's default).
+Both sides touch one byte of the page so the handoff is not optimized away.
+
+    python benchmarks/bench_page_handoff.py [--pages 50] [--width 2550 --height 3300]
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+
+from shared.shm_pages import PageBufferPool, SharedPageViews
+
+
+def _pickle_receiver(conn):
+    while True:
+        img = conn.recv()
+        if img is None:
+            return
+        conn.send(int(img[-1, -1, -1]))
+
+
+def _shm_receiver(conn):
+    views = SharedPageViews()
+    while True:
+        descriptor = conn.recv()
+        if descriptor is None:
+            return
+        conn.send(int(views.attach_page(descriptor)[-1, -1, -1]))
+
+
+def run(receiver, pages, send):
+    parent, child = multiprocessing.Pipe()
+    process = multiprocessing.get_context("spawn").Process(target=receiver, args=(child,))
+    process.start()
+    start = time.perf_counter()
+    for img in pages:
+        send(parent, img)
+    elapsed = time.perf_counter() - start
+    parent.send(None)
+    process.join()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--width", type=int, default=2550, help="default: letter at 300 DPI")
+    parser.add_argument("--height", type=int, default=3300)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    pages = [rng.integers(0, 256, (args.height, args.width, 3), dtype=np.uint8) for _ in range(4)]
+    pages = [pages[i % len(pages)] for i in range(args.pages)]
+    print(f"{args.pages} pages of {pages[0].nbytes / 1024 / 1024:.1f} MB")
+
+    def send_pickled(conn, img):
+        conn.send(img)
+        conn.recv()
+
+    pool = PageBufferPool()
+
+    def send_shared(conn, img):
+        descriptor = pool.put(img)
+        conn.send(descriptor)
+        conn.recv()
+        pool.release(descriptor)
+
+    for label, receiver, send in (("pickle", _pickle_receiver, send_pickled),
+                                  ("shared memory", _shm_receiver, send_shared)):
+        elapsed = run(receiver, pages, send)
+        print(f"{label:>14}: {elapsed / args.pages * 1000:.2f} ms/page")
+    print(f"Shared-memory buffers: {pool.allocated} allocated, {pool.reused} reused")
+    pool.close()
+
+
+if __name__ == "__main__":
+    main()
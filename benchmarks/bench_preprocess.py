@@ -0,0 +1,76 @@
+"""
+Measure what the OpenCV preprocessing steps do to OCR time and field accuracy.
+
+Rasterizes the sample PDFs once, then OCRs every page with each set of
+steps. Reports per-page preprocessing and OCR time, and how many of the
+fields found without preprocessing (dates, parcel/tax IDs, instrument
+numbers, amounts) are still found.
+
+    python benchmarks/bench_preprocess.py [--folder PATH] [--steps "" grayscale,crop ...]
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.bench_adaptive_dpi import extract_fields
+from benchmarks.bench_ocr_batching import load_pages
+from shared.ocr_pool import create_reader
+from shared.pdf_ocr import ocr_image_page
+from shared.preprocess import preprocess_page
+
+DEFAULT_STEP_SETS = [
+    "",
+    "grayscale",
+    "grayscale,crop",
+    "grayscale,crop,deskew",
+    "grayscale,crop,deskew,binarize",
+    "grayscale,crop,deskew,binarize,downscale",
+]
+
+
+def run_steps(reader, pages, steps):
+    """OCR all pages with one set of steps; returns (texts, preprocess ms/page, OCR ms/page, step timings)"""
+    texts = []
+    timings = {}
+    preprocess_s = ocr_s = 0.0
+    for img in pages:
+        start = time.perf_counter()
+        processed, _ = preprocess_page(img, steps, timings)
+        preprocess_s += time.perf_counter() - start
+        start = time.perf_counter()
+        texts.append(ocr_image_page(reader, processed)["text"])
+        ocr_s += time.perf_counter() - start
+    per_page = 1000 / max(1, len(pages))
+    return texts, preprocess_s * per_page, ocr_s * per_page, {k: v / max(1, len(pages)) for k, v in timings.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--folder", default=os.path.join(ROOT, "loudoun", "loudoun_pdf"))
+    parser.add_argument("--dpi", type=int, default=300)
+    parser.add_argument("--steps", nargs="+", default=DEFAULT_STEP_SETS)
+    args = parser.parse_args()
+
+    pages = load_pages(args.folder, args.dpi)
+    print(f"Loaded {len(pages)} pages from {args.folder} at {args.dpi} DPI")
+    reader = create_reader()
+    reader.readtext(pages[0])
+
+    baseline = None
+    for steps in args.steps:
+        texts, preprocess_ms, ocr_ms, step_ms = run_steps(reader, pages, steps)
+        if baseline is None:
+            baseline = [extract_fields(text) for text in texts]
+        expected = sum(len(fields) for fields in baseline)
+        found = sum(len(base & extract_fields(text)) for base, text in zip(baseline, texts))
+        detail = ", ".join(f"{step} {ms:.1f}" for step, ms in step_ms.items())
+        print(f"{steps or 'none':>42}: preprocess {preprocess_ms:.0f} ms + OCR {ocr_ms:.0f} ms per page, "
+              f"fields {found}/{expected}" + (f" ({detail} ms)" if detail else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Compare the PDF rasterizers used for OCR.
+
+Renders every PDF in a folder (default: loudoun/loudoun_pdf) with each
+backend in its own subprocess and reports pages/sec and peak RSS.
+
+    python benchmarks/bench_rasterize.py [--folder PATH] [--dpi 300]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from shared.pdf_ocr import RASTER_BACKENDS, iter_pdf_page_arrays
+
+
+def sample_pdfs(folder):
+    """Original (non-searchable) PDFs in the folder"""
+    return sorted(p for p in Path(folder).glob("*.pdf") if not p.name.endswith("_searchable.pdf"))
+
+
+def run_backend(backend, folder, dpi):
+    """Rasterize all sample PDFs with one backend and return its measurements"""
+    pdfs = sample_pdfs(folder)
+    pages = 0
+    checksum = 0
+    start = time.perf_counter()
+    for pdf in pdfs:
+        for _, _, img in iter_pdf_page_arrays(str(pdf), dpi, backend):
+            # Touch the pixels so lazy backends can't skip work
+            checksum += int(img[::64, ::64].sum())
+            pages += 1
+    elapsed = time.perf_counter() - start
+    return {
+        "backend": backend,
+        "documents": len(pdfs),
+        "pages": pages,
+        "seconds": round(elapsed, 3),
+        "pages_per_sec": round(pages / elapsed, 2) if elapsed else None,
+        # ru_maxrss is in KB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "checksum": checksum,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--folder", default=os.path.join(ROOT, "loudoun", "loudoun_pdf"))
+    parser.add_argument("--dpi", type=int, default=300)
+    parser.add_argument("--backend", choices=RASTER_BACKENDS, help="run a single backend in this process")
+    args = parser.parse_args()
+
+    if args.backend:
+        print(json.dumps(run_backend(args.backend, args.folder, args.dpi)))
+        return
+
+    print(f"Rasterizing {len(sample_pdfs(args.folder))} PDFs from {args.folder} at {args.dpi} DPI")
+    for backend in RASTER_BACKENDS:
+        # Separate processes so peak RSS is measured per backend
+        output = subprocess.run(
+            [sys.executable, __file__, "--backend", backend, "--folder", args.folder, "--dpi", str(args.dpi)],
+            capture_output=True, text=True
+        )
+        if output.returncode != 0:
+            print(f"{backend:>10}: failed\n{output.stderr}")
+            continue
+        r = json.loads(output.stdout.strip().splitlines()[-1])
+        print(f"{backend:>10}: {r['pages']} pages in {r['seconds']}s "
+              f"({r['pages_per_sec']} pages/sec), peak RSS {r['peak_rss_mb']} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -14,9 +14,13 @@ import pandas as pd
 import csv
 import requests
 import re
+import sys
 from PIL import Image
 from selenium.webdriver.common.action_chains import ActionChains
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.rate_control import limited_stream, limited_driver_get, browser_action, print_metrics
+
 # User credentials
 USER_ID = "XAMOTAH"
 PASSWORD = "Logar4life!"
@@ -25,6 +29,11 @@ PASSWORD = "Logar4life!"
 LOGIN_URL = "https://www.fairfaxcounty.gov/myfairfax/auth/forms/ffx-choose-login.jsp"
 CPAN_URL = "https://ccr.fairfaxcounty.gov/cpan/"
 
+# Paths are relative to this script so the scraper works from any cwd (main.py runs it from fairfax/)
+script_dir = os.path.dirname(os.path.abspath(__file__))
+PDF_FOLDER = os.path.join(script_dir, "fairfax_pdfs")
+RESULTS_CSV = os.path.join(script_dir, "fairfax_results.csv")
+
 def setup_driver():
     """Setup Chrome driver with proper configuration"""
     chrome_options = Options()
@@ -47,7 +56,7 @@ def setup_driver():
     chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
     chrome_options.add_experimental_option('useAutomationExtension', False)
     
-    download_dir = os.path.abspath(os.path.join("fairfax_pdfs"))
+    download_dir = PDF_FOLDER
     prefs = {
         "download.default_directory": download_dir,
         "download.prompt_for_download": False,
@@ -77,7 +86,8 @@ def safe_click(driver, element, wait_time=2):
         try:
             driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", element)
             time.sleep(0.5)
-            element.click()
+            with browser_action(driver):
+                element.click()
             time.sleep(wait_time)
             return True
         except Exception as e:
@@ -149,15 +159,68 @@ def wait_for_search_results(driver, table_xpath, timeout=60, max_retries=3):
                 print("All attempts to find search results failed due to errors.")
                 return None, "error"
 
+# Reads every results row in one round-trip: visible cell text and whether the
+# details icon is present, so a missing icon doesn't cost an implicit wait
+EXTRACT_RESULT_ROWS_SCRIPT = """
+var rows = arguments[0].querySelectorAll('tbody tr');
+return Array.prototype.map.call(rows, function (tr, index) {
+    return {
+        index: index,
+        cells: Array.prototype.map.call(tr.querySelectorAll('td'), function (td) { return td.innerText.trim(); }),
+        has_icon: !!tr.querySelector("img.imgIcon[src*='ImageIcon.gif']")
+    };
+});
+"""
+
+# Clicks the details icon of a row by index
+CLICK_DETAILS_ICON_SCRIPT = """
+var tr = arguments[0].querySelectorAll('tbody tr')[arguments[1]];
+var icon = tr && tr.querySelector("img.imgIcon[src*='ImageIcon.gif']");
+if (!icon) { return false; }
+icon.scrollIntoView({block: 'center'});
+icon.click();
+return true;
+"""
+
+# Raises the Kendo grid page size to the largest option it offers;
+# returns null when the grid isn't redrawn (not pageable, or already at the largest)
+MAXIMIZE_PAGE_SIZE_SCRIPT = """
+if (!window.jQuery) { return null; }
+var grid = jQuery(arguments[0]).closest('.k-grid').data('kendoGrid');
+if (!grid || !grid.options.pageable) { return null; }
+var sizes = grid.options.pageable.pageSizes;
+if (!Array.isArray(sizes) || !sizes.length) { return null; }
+var best = sizes.indexOf('all') >= 0 ? grid.dataSource.total() : Math.max.apply(null, sizes.map(Number).filter(isFinite));
+if (grid.dataSource.pageSize() === best) { return null; }
+grid.dataSource.pageSize(best);
+return best;
+"""
+
+def extract_result_rows(driver, table_elem):
+    """Return all rows of the results table as dicts with cell text and details icon presence"""
+    return driver.execute_script(EXTRACT_RESULT_ROWS_SCRIPT, table_elem)
+
+def maximize_page_size(driver, table_xpath, table_elem):
+    """Show as many results per page as the grid allows, returning the current table element"""
+    try:
+        page_size = driver.execute_script(MAXIMIZE_PAGE_SIZE_SCRIPT, table_elem)
+    except Exception as e:
+        print(f"Could not change results page size: {e}")
+        return table_elem
+    if page_size is None:
+        return table_elem
+    print(f"Results page size set to {page_size}.")
+    time.sleep(2)  # Wait for the grid to redraw
+    return wait_for_element_with_retry(driver, By.XPATH, table_xpath)
+
 def download_file_with_session(session, url, filename, timeout=60):
     """Download file using requests session with proper error handling"""
     try:
-        response = session.get(url, stream=True, timeout=timeout, headers={'User-Agent': 'Mozilla/5.0'})
-        response.raise_for_status()
-        
-        with open(filename, "wb") as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
+        with limited_stream(session, url, timeout=timeout, headers={'User-Agent': 'Mozilla/5.0'}) as response:
+            response.raise_for_status()
+            with open(filename, "wb") as f:
+                for chunk in response.iter_content(chunk_size=8192):
+                    f.write(chunk)
         return True
     except Exception as e:
         print(f"Error downloading {url}: {e}")
@@ -221,7 +284,7 @@ def main():
         
         # Open the login page
         print("Opening login page...")
-        driver.get(LOGIN_URL)
+        limited_driver_get(driver, LOGIN_URL)
         
         # Wait for the page to load and find login elements
         print("Waiting for login form to load...")
@@ -269,7 +332,7 @@ def main():
         
         # Navigate to CPAN page
         print("Navigating to CPAN page...")
-        driver.get(CPAN_URL)
+        limited_driver_get(driver, CPAN_URL)
 
         # Wait for the main search button to be clickable and click it
         print("Waiting for search panel button...")
@@ -368,7 +431,7 @@ def main():
         
         if result_status == "no_data":
             # Export empty results to CSV
-            filename = os.path.join("fairfax", f"fairfax_results.csv")
+            filename = RESULTS_CSV
             with open(filename, "w", newline='', encoding='utf-8') as f:
                 writer = csv.writer(f)
                 writer.writerow(["No results found for the search criteria"])
@@ -376,7 +439,7 @@ def main():
             return {"status": "success", "message": "Search completed but no results found."}
         elif result_status == "timeout":
             # Export timeout error to CSV
-            filename = os.path.join("fairfax", f"fairfax_results.csv")
+            filename = RESULTS_CSV
             with open(filename, "w", newline='', encoding='utf-8') as f:
                 writer = csv.writer(f)
                 writer.writerow(["Error: Search results table did not appear within timeout period"])
@@ -384,7 +447,7 @@ def main():
             return {"status": "error", "message": "Search results table did not appear within timeout period."}
         elif result_status == "error":
             # Export error to CSV
-            filename = os.path.join("fairfax", f"fairfax_results.csv")
+            filename = RESULTS_CSV
             with open(filename, "w", newline='', encoding='utf-8') as f:
                 writer = csv.writer(f)
                 writer.writerow(["Error: Failed to load search results due to technical issues"])
@@ -392,7 +455,8 @@ def main():
             return {"status": "error", "message": "Failed to load search results due to technical issues."}
         
         # If we get here, we have a successful table with data
-        rows = table_elem.find_elements(By.XPATH, ".//tbody/tr")
+        table_elem = maximize_page_size(driver, table_xpath, table_elem)
+        rows = extract_result_rows(driver, table_elem)
         print(f"Found {len(rows)} data rows in the table.")
         
         # Highlight table border red, header yellow, rows green
@@ -401,29 +465,24 @@ def main():
         driver.execute_script('var trs = arguments[0].querySelectorAll("tbody tr"); for (var i=0; i<trs.length; ++i) { trs[i].style.background = "lightgreen"; }', table_elem)
 
         # --- UPDATED LOGIC: For each row, click the details icon to open the PDF details page ---
-        pdf_folder = os.path.join("fairfax", "fairfax_pdfs")
+        pdf_folder = PDF_FOLDER
         if not os.path.exists(pdf_folder):
             os.makedirs(pdf_folder)
         main_window = driver.current_window_handle
         print("Iterating over table rows to download PDFs from details icon...")
         
-        for i, row in enumerate(rows):
+        for row in rows:
+            i = row["index"]
             try:
-                cells = row.find_elements(By.TAG_NAME, "td")
+                cells = row["cells"]
                 if not cells:
                     continue
-                # Find the <img class="imgIcon" src="../Images/ImageIcon.gif"> in the row
-                details_icon = None
-                try:
-                    details_icon = row.find_element(By.XPATH, ".//img[contains(@class, 'imgIcon') and contains(@src, 'ImageIcon.gif')]")
-                except:
-                    details_icon = None
-                if details_icon:
+                # The row has an <img class="imgIcon" src="../Images/ImageIcon.gif"> details icon
+                if row["has_icon"]:
                     print(f"Row {i+1}: Found details icon, clicking to open details page...")
                     try:
-                        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", details_icon)
-                        time.sleep(0.5)
-                        driver.execute_script("arguments[0].click();", details_icon)
+                        with browser_action(driver, CPAN_URL, kind="open_details"):
+                            driver.execute_script(CLICK_DETAILS_ICON_SCRIPT, table_elem, i)
                     except Exception as e:
                         print(f"Row {i+1}: Could not click details icon via JS: {e}")
                     time.sleep(3)  # Increased wait for new tab to open
@@ -462,8 +521,8 @@ def main():
                                     from urllib.parse import urljoin
                                     if not pdf_url.startswith('http'):
                                         pdf_url = urljoin(driver.current_url, pdf_url)
-                                    doc_type = cells[2].text.strip().replace('/', '-')
-                                    instr_num = cells[3].text.strip().replace('/', '-')
+                                    doc_type = cells[2].replace('/', '-')
+                                    instr_num = cells[3].replace('/', '-')
                                     safe_instr_num = "".join(c for c in instr_num if c.isalnum() or c in ('-'))
                                     pdf_filename = os.path.join(pdf_folder, f"{doc_type}_{safe_instr_num}_{i+1}.pdf")
                                     if download_file_with_session(s, pdf_url, pdf_filename):
@@ -502,8 +561,8 @@ def main():
                                     from urllib.parse import urljoin
                                     if not tiff_url.startswith('http'):
                                         tiff_url = urljoin(driver.current_url, tiff_url)
-                                    doc_type = cells[2].text.strip().replace('/', '-')
-                                    instr_num = cells[3].text.strip().replace('/', '-')
+                                    doc_type = cells[2].replace('/', '-')
+                                    instr_num = cells[3].replace('/', '-')
                                     safe_instr_num = "".join(c for c in instr_num if c.isalnum() or c in ('-'))
                                     filename = os.path.join(pdf_folder, f"{doc_type}_{safe_instr_num}_{i+1}.tiff")
                                     if download_file_with_session(s, tiff_url, filename):
@@ -572,7 +631,7 @@ def main():
                                     row.append(td.get_text(strip=True))
                             if row:
                                 rows.append(row)
-                    filename = os.path.join("fairfax", f"fairfax_results.csv")
+                    filename = RESULTS_CSV
                     with open(filename, "w", newline='', encoding='utf-8') as f:
                         writer = csv.writer(f)
                         if headers:
@@ -585,6 +644,8 @@ def main():
         except Exception as e:
             print(f"Error exporting results to CSV: {e}")
 
+        print_metrics()
+
     except TimeoutException as e:
         print(f"Timeout error occurred: {e}")
         if driver:
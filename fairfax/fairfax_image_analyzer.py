@@ -1,14 +1,24 @@
 import os
+import sys
 import glob
 import pandas as pd
 import tiktoken
 from openai import OpenAI
 from pathlib import Path
 import json
+import queue
+import threading
+import time
 from datetime import datetime
-import easyocr
 from dotenv import load_dotenv
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.fields_first import analyze_document
+from shared.ocr_backends import load_image
+from shared.ocr_pool import get_leased_reader, idle_leased_reader
+from shared.ocr_sidecar import extract_document_text
+from shared.pdf_ocr import OCR_PAGE_BATCH, ocr_image_pages
+
 # Load environment variables
 load_dotenv()
 
@@ -150,43 +160,108 @@ def clean_apn_taxid(apn):
     cleaned = ''.join(c for c in apn if c.isdigit())
     return cleaned if cleaned else apn
 
-def extract_text_from_image(image_path):
-    """Extract text from image using EasyOCR"""
-    try:
-        reader = easyocr.Reader(['en'], gpu=False)
-        result = reader.readtext(image_path, detail=0)
-        text = " ".join(result)
-        return text
-    except Exception as e:
-        print(f"Error extracting text from {image_path}: {e}")
-        return ""
+def get_reader():
+    """The process's one OCR reader (OCR_BACKEND), shared with fields-first OCR; its threads follow the OCR scheduler"""
+    return get_leased_reader().refresh()
+
+def iter_decoded_images(image_paths, prefetch=2 * OCR_PAGE_BATCH):
+    """Yield (image_path, image or None, decode_ms), decoding up to ``prefetch`` images ahead in a background thread"""
+    decoded = queue.Queue(maxsize=prefetch)
+
+    def decode():
+        for image_path in image_paths:
+            start = time.perf_counter()
+            try:
+                img = load_image(image_path)
+            except Exception as e:
+                print(f"Error decoding {image_path}: {e}")
+                img = None
+            decoded.put((image_path, img, (time.perf_counter() - start) * 1000))
+
+    threading.Thread(target=decode, daemon=True).start()
+    for _ in image_paths:
+        yield decoded.get()
+
+def extract_texts_from_images(image_paths, batch_size=OCR_PAGE_BATCH):
+    """
+    Yield (image_path, text) for each image, OCR'ing ``batch_size`` images per call on one shared reader.
+
+    Decoding the next images overlaps with OCR of the current batch; per-image
+    decode and OCR times are printed as each batch completes.
+    """
+    batch = []
+    for item in iter_decoded_images(image_paths):
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield from _ocr_image_batch(batch)
+            batch = []
+    if batch:
+        yield from _ocr_image_batch(batch)
+
+def _ocr_image_batch(batch):
+    images = [img for _, img, _ in batch if img is not None]
+    texts = []
+    ocr_ms = 0.0
+    if images:
+        start = time.perf_counter()
+        try:
+            texts = [record["text"] for record in ocr_image_pages(get_reader(), images)]
+        except Exception as e:
+            print(f"Error extracting text from {len(images)} images: {e}")
+            texts = [""] * len(images)
+        finally:
+            idle_leased_reader()
+        ocr_ms = (time.perf_counter() - start) * 1000
+    texts = iter(texts)
+    for image_path, img, decode_ms in batch:
+        if img is None:
+            yield image_path, ""
+            continue
+        # Same-sized images share detector passes, so OCR time is the image's share of its batch
+        print(f"  {os.path.basename(image_path)}: decode {decode_ms:.0f} ms, "
+              f"OCR {ocr_ms / len(images):.0f} ms (batch of {len(images)})")
+        yield image_path, next(texts)
+
+def iter_document_texts(image_files, searchable_pdfs):
+    """Yield (path, text) for the images, then for the PDFs through their OCR sidecars"""
+    yield from extract_texts_from_images(image_files)
+    for pdf_path in searchable_pdfs:
+        yield pdf_path, extract_document_text(pdf_path, extract_text_from_pdf)
 
 def main():
-    # Path to the image directory
-    image_directory = os.path.join(os.path.dirname(__file__), "fairfax_pdfs")
+    # fairfax_pdf_processor.py OCRs every PDF, TIFF and PNG the scraper saves here exactly once
+    document_directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fairfax_pdfs")
+    
+    # Searchable PDFs are read through their OCR sidecars
+    searchable_pdfs = sorted(glob.glob(os.path.join(document_directory, "*_searchable.pdf")))
     
-    # Find all image files (png, jpg, jpeg)
-    image_files = []
-    for ext in ("*.png", "*.jpg", "*.jpeg"):
-        image_files.extend(glob.glob(os.path.join(image_directory, ext)))
+    # Images are only OCR'd here when the processor hasn't ingested them yet, one image per document
+    ingested = {os.path.basename(p)[:-len("_searchable.pdf")] for p in searchable_pdfs}
+    images_by_stem = {}
+    for ext in ("*.tif", "*.tiff", "*.png", "*.jpg", "*.jpeg"):
+        for image_path in sorted(glob.glob(os.path.join(document_directory, ext))):
+            stem = os.path.splitext(os.path.basename(image_path))[0]
+            if stem not in ingested:
+                images_by_stem.setdefault(stem, image_path)
+    image_files = list(images_by_stem.values())
     
-    if not image_files:
-        print("No image files found!")
+    if not image_files and not searchable_pdfs:
+        print("No documents found!")
         return
     
-    print(f"Found {len(image_files)} image files")
+    print(f"Found {len(searchable_pdfs)} searchable PDFs and {len(image_files)} images not yet OCR'd by fairfax_pdf_processor.py")
     
     # Store all results
     all_results = []
     
-    for image_path in image_files:
+    # Text from the images (OCR'd in batches here), or from each PDF's OCR sidecar
+    for image_path, text in iter_document_texts(image_files, searchable_pdfs):
         image_name = os.path.basename(image_path)
         print(f"Processing: {image_name}")
         
-        # Extract text from image
-        text = extract_text_from_image(image_path)
-        
-        if not text.strip():
+        # Analyze with OpenAI; fields-first PDFs get more pages OCR'd only while a field is still missing
+        analysis_result = analyze_document(text, image_path, lambda more: analyze_pdf_with_openai(more, image_name))
+        if analysis_result is None:
             print(f"No text extracted from {image_name}")
             result = {
                 "image_name": image_name,
@@ -198,9 +273,6 @@ def main():
             all_results.append(result)
             continue
         
-        # Analyze with OpenAI
-        analysis_result = analyze_pdf_with_openai(text, image_name)
-        
         # Add to results
         apn_raw = analysis_result.get("apn_taxid", "Not Found")
         result = {
@@ -218,7 +290,7 @@ def main():
     print("ANALYSIS RESULTS (JSON FORMAT)")
     print("="*50)
     print(json.dumps(all_results, indent=2, ensure_ascii=False))
-    print(f"\nTotal images processed: {len(image_files)}")
+    print(f"\nTotal images processed: {len(image_files) + len(searchable_pdfs)}")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
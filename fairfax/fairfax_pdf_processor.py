@@ -1,71 +1,71 @@
-import easyocr
-from pdf2image import convert_from_path
-from PIL import Image
-from fpdf import FPDF
-import numpy as np
-import re
 import os
+import sys
 import glob
 from pathlib import Path
 
-def process_pdf_to_searchable(input_pdf_path, output_pdf_path, reader):
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.fields_first import has_pending_pages
+from shared.ocr_pool import run_ocr_jobs, merge_stats
+from shared.pdf_ocr import print_ocr_stats
+
+# The scraper saves a PDF when the county offers one, otherwise a TIFF plus a PNG of its first page;
+# earlier extensions win when a document has several images
+IMAGE_EXTENSIONS = (".tif", ".tiff", ".png", ".jpg", ".jpeg")
+
+# Resolution the OCR pipeline renders pages at (run_ocr_jobs' default dpi)
+OCR_RENDER_DPI = 300
+
+def image_to_pdf(image_path, pdf_path, dpi=OCR_RENDER_DPI):
     """
-    Process a single PDF file to make it searchable using OCR
+    Wrap a (possibly multi-page) image in a PDF without re-encoding it.
+
+    Each page is sized so that rendering it at ``dpi`` gives back the
+    image's own pixels. convert_to_pdf sizes pages from the image's DPI
+    tag (96 when it has none), which would make a 300 DPI render upsample
+    the scan or blow it up.
     """
-    try:
-        print(f"Processing: {input_pdf_path}")
-        
-        # Convert PDF to images
-        pages = convert_from_path(input_pdf_path, 300)
-        
-        # Create new PDF
-        pdf = FPDF()
-        
-        for i, page in enumerate(pages):
-            print(f"  Processing page {i+1}/{len(pages)}")
-            
-            # Convert PIL image to numpy array for EasyOCR
-            img_array = np.array(page)
-            
-            # Extract text using EasyOCR
-            results = reader.readtext(img_array)
-            
-            # Combine all detected text and clean up special characters
-            text = '\n'.join([result[1] for result in results])
-            
-            # Clean up text to remove problematic Unicode characters
-            # Replace common problematic characters with ASCII equivalents
-            text = text.replace('€', 'EUR')
-            text = text.replace('£', 'GBP')
-            text = text.replace('$', 'USD')
-            text = text.replace('°', ' degrees')
-            text = text.replace('±', '+/-')
-            text = text.replace('×', 'x')
-            text = text.replace('÷', '/')
-            
-            # Remove any remaining non-ASCII characters
-            text = re.sub(r'[^\x00-\x7F]+', ' ', text)
-            
-            # Clean up extra whitespace
-            text = re.sub(r'\s+', ' ', text).strip()
-            
-            pdf.add_page()
-            pdf.set_auto_page_break(auto=True, margin=15)
-            pdf.set_font("Arial", size=12)
-            pdf.multi_cell(0, 10, text)
-        
-        # Save the searchable PDF
-        pdf.output(output_pdf_path)
-        print(f"  ✓ Completed: {output_pdf_path}")
-        return True
-        
-    except Exception as e:
-        print(f"  ✗ Error processing {input_pdf_path}: {str(e)}")
-        return False
+    import fitz  # PyMuPDF
+    pdf = fitz.open()
+    with fitz.open(image_path) as image:
+        for i in range(image.page_count):
+            with fitz.open("pdf", image.convert_to_pdf(i, i)) as page_pdf:
+                width, height = page_pdf.get_page_images(0)[0][2:4]
+                page = pdf.new_page(width=width * 72 / dpi, height=height * 72 / dpi)
+                page.show_pdf_page(page.rect, page_pdf, 0)
+    tmp_path = str(pdf_path) + ".tmp"
+    pdf.save(tmp_path, garbage=3, deflate=True)
+    pdf.close()
+    os.replace(tmp_path, pdf_path)
+
+def ingest_images(folder_path):
+    """
+    Convert image-only documents to PDFs so they are OCR'd once, together with the PDFs.
+
+    Images are grouped into documents by file stem and only the best one is
+    converted (the TIFF holds every page, the PNG only the first). The images
+    are deleted once the document has a PDF.
+    """
+    documents = {}
+    for f in sorted(folder_path.iterdir()):
+        if f.suffix.lower() in IMAGE_EXTENSIONS:
+            documents.setdefault(f.stem, []).append(f)
+    
+    for stem, images in documents.items():
+        pdf_path = folder_path / (stem + ".pdf")
+        if not pdf_path.exists() and not (folder_path / (stem + "_searchable.pdf")).exists():
+            source = min(images, key=lambda f: IMAGE_EXTENSIONS.index(f.suffix.lower()))
+            try:
+                image_to_pdf(source, pdf_path)
+                print(f"  ✓ Converted {source.name} to {pdf_path.name}")
+            except Exception as e:
+                print(f"  ✗ Error converting {source.name} to PDF: {str(e)}")
+                continue
+        for image in images:
+            image.unlink()
 
 def process_all_pdfs_in_folder(folder_path):
     """
-    Process all PDF files in the specified folder and delete originals after creating searchable versions
+    Process all PDF, TIFF and PNG documents in the specified folder and delete originals after creating searchable versions
     """
     # Get the absolute path to the folder
     folder_path = Path(folder_path).resolve()
@@ -74,8 +74,12 @@ def process_all_pdfs_in_folder(folder_path):
         print(f"Error: Folder {folder_path} does not exist!")
         return
     
+    # Images go through the same OCR pass as PDFs, so the analyzer only reads sidecars
+    ingest_images(folder_path)
+    
     # Find all PDF files in the folder (excluding already searchable ones)
-    pdf_files = [f for f in folder_path.glob("*.pdf") if not f.name.endswith("_searchable.pdf")]
+    pdf_files = [f for f in folder_path.glob("*.pdf") if not f.name.endswith("_searchable.pdf")
+                 and not has_pending_pages(folder_path / (f.stem + "_searchable.pdf"))]
     
     if not pdf_files:
         print(f"No original PDF files found in {folder_path}")
@@ -85,24 +89,21 @@ def process_all_pdfs_in_folder(folder_path):
     for pdf_file in pdf_files:
         print(f"  - {pdf_file.name}")
     
-    # Initialize EasyOCR reader once
-    print("Initializing EasyOCR reader...")
-    reader = easyocr.Reader(['en'])
-    print("EasyOCR reader initialized.")
-    
     print("\nStarting OCR processing...")
     
-    # Process each PDF file
-    for pdf_file in pdf_files:
-        # Create output filename with "_searchable" suffix
-        output_filename = pdf_file.stem + "_searchable.pdf"
-        output_path = pdf_file.parent / output_filename
-        
-        # Process the PDF
-        success = process_pdf_to_searchable(str(pdf_file), str(output_path), reader)
+    # OCR all PDFs across the worker pool; results come back in the same order as pdf_files
+    output_paths = [pdf_file.parent / (pdf_file.stem + "_searchable.pdf") for pdf_file in pdf_files]
+    results = run_ocr_jobs([(str(pdf_file), str(output_path)) for pdf_file, output_path in zip(pdf_files, output_paths)])
+    
+    stats = {}
+    for pdf_file, output_path, (success, doc_stats) in zip(pdf_files, output_paths, results):
+        merge_stats(stats, doc_stats)
         
         # If searchable PDF was created successfully, delete the original
-        if success and output_path.exists():
+        # (fields-first documents keep it until the analyzer has OCR'd the pending pages)
+        if success and doc_stats.get("pending_pages"):
+            print(f"  ⏸ Keeping original for on-demand OCR of {doc_stats['pending_pages']} pages: {pdf_file.name}")
+        elif success and output_path.exists():
             try:
                 pdf_file.unlink()
                 print(f"  ✓ Deleted original: {pdf_file.name}")
@@ -114,9 +115,10 @@ def process_all_pdfs_in_folder(folder_path):
         print()  # Add blank line between files
     
     print("All PDF processing completed!")
+    print_ocr_stats(stats)
     print("Original PDF files have been deleted. Only searchable PDFs remain in the folder.")
 
 if __name__ == "__main__":
-    # Process all PDFs in the fairfax_pdf folder
-    pdf_folder = "fairfax/fairfax_pdf"
+    # Process all documents in the fairfax_pdfs folder the scraper downloads into
+    pdf_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fairfax_pdfs")
     process_all_pdfs_in_folder(pdf_folder) 
\ No newline at end of file
@@ -7,7 +7,6 @@ from datetime import datetime
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import NoSuchElementException, TimeoutException, WebDriverException
-from selenium.webdriver.common.action_chains import ActionChains
 
 import os
 import requests
@@ -16,6 +15,12 @@ import glob
 import tempfile
 import uuid
 import random
+import sys
+import json
+import re
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.rate_control import limited_stream, limited_driver_get, browser_action, print_metrics
 
 # Credentials
 USERNAME = "nmotahedy"
@@ -30,6 +35,18 @@ PDF_FOLDER = os.path.join(script_dir, "loudoun_pdf")
 if not os.path.exists(PDF_FOLDER):
     os.makedirs(PDF_FOLDER)
 
+# Row-level checkpoint so a crashed run can resume where it stopped.
+# Pass --fresh to ignore an existing checkpoint and start from page 1.
+CHECKPOINT_FILE = os.path.join(script_dir, "loudoun_checkpoint.json")
+RESUME = "--fresh" not in sys.argv
+
+# How long to wait for Chrome to start a download after Save Image, and to finish it
+DOWNLOAD_START_TIMEOUT = 20
+DOWNLOAD_FINISH_TIMEOUT = 300
+
+# Chrome downloads seen through CDP events, keyed by download guid
+chrome_downloads = {}
+
 def setup_chrome_driver():
     """Setup Chrome driver with headless mode"""
     chrome_options = Options()
@@ -55,6 +72,9 @@ def setup_chrome_driver():
     chrome_options.add_argument("--disable-notifications")
     chrome_options.add_argument("--disable-popup-blocking")
     
+    # Performance logging carries the CDP download events we track downloads with
+    chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    
     # Generate unique user data directory
     unique_user_data_dir = os.path.join(tempfile.gettempdir(), f"chrome_user_data_{uuid.uuid4().hex[:8]}")
     chrome_options.add_argument(f"--user-data-dir={unique_user_data_dir}")
@@ -70,24 +90,25 @@ def setup_chrome_driver():
     return webdriver.Chrome(service=service, options=chrome_options)
 
 def download_pdf(url, filename):
-    """Download PDF from URL and save to folder"""
+    """Download PDF from URL and save to folder, returning the saved path"""
     try:
         # Clean filename
         clean_name = clean_filename(filename)
         unique_filename = generate_unique_filename(clean_name)
         
-        response = requests.get(url, stream=True)
-        response.raise_for_status()
-        
+        # Stream to a .part file and rename once complete so partial files never match *.pdf
         filepath = os.path.join(PDF_FOLDER, unique_filename)
-        with open(filepath, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
+        with limited_stream(requests, url) as response:
+            response.raise_for_status()
+            with open(filepath + ".part", 'wb') as f:
+                for chunk in response.iter_content(chunk_size=8192):
+                    f.write(chunk)
+        os.replace(filepath + ".part", filepath)
         print(f"📄 PDF saved: {filepath}")
-        return True
+        return filepath
     except Exception as e:
         print(f"❌ Error downloading PDF {filename}: {e}")
-        return False
+        return None
 
 def find_and_download_pdfs(driver):
     """Find PDF links on the current page and download them"""
@@ -121,20 +142,109 @@ def find_and_download_pdfs(driver):
     except Exception as e:
         print(f"❌ Error finding PDFs: {e}")
 
+def enable_download_events(driver):
+    """
+    Have Chrome report downloads through CDP events.
+
+    Files are written under their download guid and only renamed to a .pdf
+    name once complete, so the OCR stage never globs a partial download.
+    """
+    driver.execute_cdp_cmd("Browser.setDownloadBehavior", {
+        "behavior": "allowAndName",
+        "downloadPath": os.path.abspath(PDF_FOLDER),
+        "eventsEnabled": True
+    })
+    driver.execute_cdp_cmd("Page.enable", {})
+
+def poll_download_events(driver):
+    """Read pending CDP download events from the performance log into chrome_downloads"""
+    for entry in driver.get_log("performance"):
+        try:
+            message = json.loads(entry["message"])["message"]
+        except (KeyError, ValueError):
+            continue
+        method = message.get("method", "")
+        params = message.get("params", {})
+        # Chrome reports these under the Browser domain and, for page-initiated
+        # downloads, under the Page domain as well
+        if method.endswith(".downloadWillBegin"):
+            chrome_downloads.setdefault(params["guid"], {}).update({
+                "url": params.get("url"),
+                "suggested_filename": params.get("suggestedFilename"),
+                "state": "inProgress"
+            })
+        elif method.endswith(".downloadProgress"):
+            download = chrome_downloads.setdefault(params["guid"], {})
+            download["state"] = params.get("state")
+            download["received_bytes"] = params.get("receivedBytes")
+            if params.get("filePath"):
+                download["file_path"] = params["filePath"]
+
+def wait_for_chrome_download(driver, known_guids, row_index, page_number):
+    """
+    Wait for the download started after a click to complete and move it to its final name.
+
+    Returns the final PDF path, or None if Chrome never started a download
+    or the download was canceled.
+    """
+    start_deadline = time.time() + DOWNLOAD_START_TIMEOUT
+    guid = None
+    while guid is None:
+        poll_download_events(driver)
+        new_guids = [g for g in chrome_downloads if g not in known_guids]
+        if new_guids:
+            guid = new_guids[0]
+        elif time.time() > start_deadline:
+            return None
+        else:
+            time.sleep(0.2)
+    print(f"⬇️ Chrome download started for row {row_index}")
+    
+    finish_deadline = time.time() + DOWNLOAD_FINISH_TIMEOUT
+    while chrome_downloads[guid].get("state") == "inProgress":
+        if time.time() > finish_deadline:
+            print(f"❌ Download for row {row_index} did not finish within {DOWNLOAD_FINISH_TIMEOUT}s")
+            return None
+        time.sleep(0.2)
+        poll_download_events(driver)
+    
+    download = chrome_downloads[guid]
+    if download.get("state") != "completed":
+        print(f"❌ Download for row {row_index} ended with state {download.get('state')}")
+        return None
+    
+    suggested = download.get("suggested_filename") or f"row_{row_index}_page_{page_number}_saved_image.pdf"
+    if not suggested.lower().endswith(".pdf"):
+        suggested += ".pdf"
+    final_path = os.path.join(PDF_FOLDER, generate_unique_filename(clean_filename(suggested)))
+    os.replace(download.get("file_path") or os.path.join(PDF_FOLDER, guid), final_path)
+    download["final_path"] = final_path
+    return final_path
+
 def click_save_image_and_download(driver, row_index, page_number):
-    """Click on the Save Image link and download the PDF"""
+    """Click on the Save Image link and return the path of the completed PDF download"""
     try:
         # Look for the Save Image link
         save_image_link = driver.find_element(By.ID, "lnkSaveImage")
         if save_image_link:
             print(f"💾 Found Save Image link for row {row_index}")
             
+            # Note the downloads we already know about so we pick up only the new one
+            poll_download_events(driver)
+            known_guids = set(chrome_downloads)
+            
             # Click on the Save Image link
-            save_image_link.click()
+            with browser_action(driver):
+                save_image_link.click()
             print(f"🖱️ Clicked Save Image link for row {row_index}")
             
-            # Wait for download to start
-            time.sleep(2)
+            # Wait exactly until Chrome reports the file complete
+            pdf_path = wait_for_chrome_download(driver, known_guids, row_index, page_number)
+            if pdf_path:
+                print(f"📄 PDF saved: {pdf_path}")
+                return pdf_path
+            
+            print(f"⚠️ No Chrome download for row {row_index}, looking for PDF links instead")
             
             # Try to find any download links or PDF links that might appear
             try:
@@ -151,7 +261,7 @@ def click_save_image_and_download(driver, row_index, page_number):
                             
                             print(f"📥 Downloading PDF from Save Image: {href}")
                             print(f"   📝 Filename: {filename}")
-                            download_pdf(href, filename)
+                            pdf_path = download_pdf(href, filename) or pdf_path
                             
                     except Exception as e:
                         print(f"❌ Error processing PDF link from Save Image: {e}")
@@ -160,14 +270,14 @@ def click_save_image_and_download(driver, row_index, page_number):
             except Exception as e:
                 print(f"❌ Error finding PDF links after Save Image click: {e}")
             
-            return True
+            return pdf_path
             
     except NoSuchElementException:
         print(f"⚠️ Save Image link not found for row {row_index}")
-        return False
+        return None
     except Exception as e:
         print(f"❌ Error clicking Save Image for row {row_index}: {e}")
-        return False
+        return None
 
 def generate_unique_filename(base_filename):
     """Generate a unique filename to avoid duplicates"""
@@ -196,6 +306,167 @@ def clean_filename(filename):
     
     return filename
 
+def load_checkpoint(search_key):
+    """Load the checkpoint for this search, or an empty one if none matches"""
+    empty = {"search_key": search_key, "page": 1, "row": 0, "instrument": None, "done": [], "failed": {}}
+    if not RESUME or not os.path.exists(CHECKPOINT_FILE):
+        return empty
+    try:
+        with open(CHECKPOINT_FILE, "r", encoding="utf-8") as f:
+            checkpoint = json.load(f)
+    except Exception as e:
+        print(f"⚠️ Could not read checkpoint, starting fresh: {e}")
+        return empty
+    if checkpoint.get("search_key") != search_key:
+        print("⚠️ Checkpoint belongs to a different search, starting fresh")
+        return empty
+    checkpoint.setdefault("failed", {})
+    return checkpoint
+
+def save_checkpoint(checkpoint, page_number, row_index, instrument, saved=True):
+    """
+    Record a processed row; written atomically so a crash never leaves a torn file.
+
+    Rows whose download failed (``saved=False``) are not marked done, and the
+    resume page stays at the earliest page that still has one so the next
+    run retries it.
+    """
+    failed = checkpoint["failed"]
+    if saved:
+        failed.pop(instrument, None)
+        if instrument not in checkpoint["done"]:
+            checkpoint["done"].append(instrument)
+    else:
+        failed[instrument] = page_number
+    checkpoint["page"] = min([page_number, *failed.values()])
+    checkpoint["row"] = row_index
+    checkpoint["instrument"] = instrument
+    tmp_path = CHECKPOINT_FILE + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, CHECKPOINT_FILE)
+
+def clear_checkpoint(checkpoint):
+    """Remove the checkpoint after a complete run, unless rows failed and should be retried"""
+    if checkpoint["failed"]:
+        print(f"⚠️ {len(checkpoint['failed'])} rows failed to download; keeping the checkpoint so the next run retries them")
+        return
+    if os.path.exists(CHECKPOINT_FILE):
+        os.remove(CHECKPOINT_FILE)
+
+# Reads every row of the results grid in one round-trip instead of several
+# WebDriver calls per row
+EXTRACT_GRID_ROWS_SCRIPT = """
+var table = document.getElementById('gridResults');
+if (!table) { return {headers: [], rows: []}; }
+var headers = Array.prototype.map.call(table.querySelectorAll('thead th'), function (th) {
+    return th.textContent.trim();
+});
+var rows = [];
+Array.prototype.forEach.call(table.querySelectorAll('tbody tr'), function (tr, index) {
+    if (tr.querySelector('td.dataTables_empty')) { return; }
+    rows.push({
+        index: index,
+        id: tr.id || null,
+        cells: Array.prototype.map.call(tr.querySelectorAll('td'), function (td) { return td.textContent.trim(); }),
+        links: Array.prototype.map.call(tr.querySelectorAll('a[href]'), function (a) { return a.href; })
+    });
+});
+return {headers: headers, rows: rows};
+"""
+
+# Opens a row in the document viewer the same way a user double-click does
+OPEN_GRID_ROW_SCRIPT = """
+var tr = document.querySelectorAll('#gridResults tbody tr')[arguments[0]];
+if (!tr) { return false; }
+tr.scrollIntoView({block: 'center'});
+tr.dispatchEvent(new MouseEvent('click', {bubbles: true, cancelable: true, view: window}));
+tr.dispatchEvent(new MouseEvent('dblclick', {bubbles: true, cancelable: true, view: window, detail: 2}));
+return true;
+"""
+
+# Raises the DataTables page length to the largest option the grid offers;
+# returns null when the grid isn't redrawn (unsupported, or already at the largest)
+MAXIMIZE_PAGE_LENGTH_SCRIPT = """
+if (!window.jQuery || !jQuery.fn.dataTable) { return null; }
+var api = jQuery('#gridResults').DataTable();
+var menu = api.settings()[0].aLengthMenu || [];
+var lengths = (Array.isArray(menu[0]) ? menu[0] : menu).map(Number);
+if (!lengths.length) { return null; }
+var best = lengths.indexOf(-1) >= 0 ? -1 : Math.max.apply(null, lengths);
+if (api.page.len() === best) { return null; }
+api.page.len(best).draw();
+return best;
+"""
+
+def extract_grid_rows(driver):
+    """Return the current page of gridResults as dicts with document type, instrument number, row id and links"""
+    grid = driver.execute_script(EXTRACT_GRID_ROWS_SCRIPT)
+    headers = [h.lower() for h in grid["headers"]]
+    instrument_col = next((c for c, h in enumerate(headers) if "instrument" in h), None)
+    doc_type_col = next((c for c, h in enumerate(headers) if "type" in h), None)
+    rows = []
+    for row in grid["rows"]:
+        cells = row["cells"]
+        instrument = None
+        if instrument_col is not None and instrument_col < len(cells):
+            instrument = cells[instrument_col] or None
+        if not instrument:
+            match = re.search(r"\b\d{10,}\b", " ".join(cells))
+            instrument = match.group(0) if match else None
+        row["instrument"] = instrument
+        row["doc_type"] = cells[doc_type_col] if doc_type_col is not None and doc_type_col < len(cells) else None
+        rows.append(row)
+    return rows
+
+def row_instrument_id(row, page_number):
+    """Identify a results row by its instrument number, falling back to its row id or position"""
+    return row["instrument"] or row["id"] or f"page{page_number}_row{row['index'] + 1}"
+
+def maximize_page_length(driver, wait, table):
+    """Show as many results per page as the grid allows, returning the (possibly redrawn) table"""
+    try:
+        page_length = driver.execute_script(MAXIMIZE_PAGE_LENGTH_SCRIPT)
+    except Exception as e:
+        print(f"⚠️ Could not change page length: {e}")
+        return table
+    if page_length is None:
+        return table
+    print(f"📏 Results page length set to {'all' if page_length == -1 else page_length}")
+    try:
+        WebDriverWait(driver, 10).until(EC.staleness_of(table))
+    except TimeoutException:
+        # The grid redrew its rows in place
+        pass
+    return wait.until(EC.presence_of_element_located((By.XPATH, "//table[@id='gridResults']")))
+
+def jump_to_page(driver, wait, table, page_number):
+    """Jump the results grid straight to a page, clicking Next only if the DataTables API is unavailable"""
+    if page_number <= 1:
+        return table
+    try:
+        jumped = driver.execute_script(
+            "if (!window.jQuery || !jQuery.fn.dataTable) { return false; }"
+            "jQuery('#gridResults').DataTable().page(arguments[0]).draw('page');"
+            "return true;", page_number - 1)
+    except Exception as e:
+        print(f"⚠️ DataTables page jump failed: {e}")
+        jumped = False
+    if jumped:
+        wait.until(EC.staleness_of(table))
+        print(f"⏩ Jumped to page {page_number}")
+        return wait.until(EC.presence_of_element_located((By.XPATH, "//table[@id='gridResults']")))
+    for _ in range(page_number - 1):
+        next_button = driver.find_element(By.ID, "gridResults_next")
+        with browser_action(driver, URL, kind="next_page"):
+            next_button.click()
+            wait.until(EC.staleness_of(table))
+        table = wait.until(EC.presence_of_element_located((By.XPATH, "//table[@id='gridResults']")))
+    print(f"⏩ Paged forward to page {page_number}")
+    return table
+
 def highlight(element):
     """Highlights a web element by drawing a red border around it."""
     try:
@@ -206,12 +477,13 @@ def highlight(element):
 # Initialize WebDriver
 driver = setup_chrome_driver()
 wait = WebDriverWait(driver, 30)
+enable_download_events(driver)
 
 try:
     print("🌐 Accessing Loudoun County website...")
     
     # Open the login page
-    driver.get(URL)
+    limited_driver_get(driver, URL)
     print("✅ Successfully loaded login page")
     time.sleep(3)
     
@@ -226,14 +498,15 @@ try:
     
     # Click login button
     login_button = wait.until(EC.element_to_be_clickable((By.ID, "btnLogin")))
-    login_button.click()
+    with browser_action(driver, URL):
+        login_button.click()
     print("✅ Login credentials entered")
     
     time.sleep(3)
     
     # Navigate to search page
     print("🔍 Navigating to search page...")
-    driver.get("https://lisweb.loudoun.gov/PAXSubscription/views/search")
+    limited_driver_get(driver, "https://lisweb.loudoun.gov/PAXSubscription/views/search")
     print("✅ Successfully loaded search page")
     
     # Click on "Advanced/Legal Search"
@@ -250,6 +523,15 @@ try:
     wait.until(EC.element_to_be_clickable((By.XPATH, "/html/body/form/div[4]/div[5]/div[2]/div[1]/div/div[3]/div[2]/div/div/ul/li[2]/ul/li[60]/a"))).click()
     print("✅ Deed items selected")
     
+    # The search covers the 1st of last month through today; resumes only apply to the same search
+    today = datetime.now()
+    search_key = f"{today.year}-{today.month:02d}-{today.day:02d}"
+    checkpoint = load_checkpoint(search_key)
+    done_instruments = set(checkpoint["done"])
+    if done_instruments:
+        print(f"♻️ Resuming from page {checkpoint['page']}, row {checkpoint['row']} ({len(done_instruments)} rows already done, "
+              f"{len(checkpoint['failed'])} to retry)")
+    
     # Select From Date
     from_date_input = wait.until(EC.element_to_be_clickable((By.ID, "dtFrom")))
     from_date_input.click()
@@ -268,20 +550,22 @@ try:
     
     # Wait for calendar to appear and select today's date
     wait.until(EC.visibility_of_element_located((By.ID, "ui-datepicker-div")))
-    today_day = datetime.now().day
+    today_day = today.day
     wait.until(EC.element_to_be_clickable((By.XPATH, f"//div[@id='ui-datepicker-div']//td[not(contains(@class,'ui-datepicker-other-month'))]/a[text()='{today_day}']"))).click()
     print("✅ To date selected")
     
-    # Click on the Summary Search button
-    wait.until(EC.element_to_be_clickable((By.ID, "btnSummarySearch"))).click()
-    print("✅ Search initiated")
-    
-    # Wait for the results table to appear
-    table = wait.until(EC.presence_of_element_located((By.XPATH, "//table[@id='gridResults']")))
+    # Click on the Summary Search button and wait for the results table to appear
+    with browser_action(driver, URL, kind="search"):
+        wait.until(EC.element_to_be_clickable((By.ID, "btnSummarySearch"))).click()
+        print("✅ Search initiated")
+        table = wait.until(EC.presence_of_element_located((By.XPATH, "//table[@id='gridResults']")))
     highlight(table)
     print("✅ Results table found")
     
-    page_number = 1
+    # Fewer, larger pages; must happen before jumping so checkpointed page numbers line up
+    table = maximize_page_length(driver, wait, table)
+    page_number = checkpoint["page"]
+    table = jump_to_page(driver, wait, table, page_number)
     print("🔍 Starting to scrape PDFs...")
     
     while True:
@@ -291,42 +575,47 @@ try:
         table = wait.until(EC.presence_of_element_located((By.XPATH, "//table[@id='gridResults']")))
         wait.until(EC.visibility_of_all_elements_located((By.XPATH, "//table[@id='gridResults']/tbody/tr")))
         
-        # Extract table rows from the current page
-        rows_on_page = table.find_elements(By.XPATH, ".//tbody/tr")
+        # Extract all table rows from the current page in one call
+        rows_on_page = extract_grid_rows(driver)
         print(f"Found {len(rows_on_page)} rows on page {page_number}.")
         
-        for i, tr in enumerate(rows_on_page):
+        for row in rows_on_page:
+            i = row["index"]
+            instrument = None
             try:
-                # Highlight the current row
-                highlight(tr)
-                print(f" Processing row {i+1} on page {page_number}")
+                instrument = row_instrument_id(row, page_number)
+                if instrument in done_instruments:
+                    print(f"⏭️ Skipping row {i+1} on page {page_number} ({instrument}), already done")
+                    continue
                 
-                # Double-click on the row
-                actions = ActionChains(driver)
-                actions.double_click(tr).perform()
-                print(f"🖱️ Double-clicked row {i+1} on page {page_number}")
+                print(f" Processing row {i+1} on page {page_number}: {row['doc_type'] or 'unknown type'} {instrument}")
                 
-                # Wait for viewer container to appear and load content
-                try:
-                    viewer_container = wait.until(EC.presence_of_element_located((By.ID, "viewerContainer")))
-                    print(f"📋 Viewer container found for row {i+1}")
-                    
-                    # Wait for content to load in the viewer
-                    wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "#viewerContainer .page")))
-                    print(f"📄 Page content loaded for row {i+1}")
+                # Double-click on the row and wait for the viewer to load the document
+                with browser_action(driver, URL, kind="open_row"):
+                    if not driver.execute_script(OPEN_GRID_ROW_SCRIPT, i):
+                        raise Exception("row is no longer in the grid")
+                    print(f"🖱️ Double-clicked row {i+1} on page {page_number}")
                     
-                    # Additional wait for canvas to be rendered
                     try:
-                        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "#viewerContainer canvas")))
-                        print(f"🎨 Canvas rendered for row {i+1}")
-                    except:
-                        print(f"⚠️ Canvas not found for row {i+1}, continuing anyway")
-                    
-                    # Wait a bit more for any additional content to load
-                    time.sleep(3)
-                    
-                except Exception as e:
-                    print(f"⚠️ Viewer container not found or content not loaded for row {i+1}: {e}")
+                        viewer_container = wait.until(EC.presence_of_element_located((By.ID, "viewerContainer")))
+                        print(f"📋 Viewer container found for row {i+1}")
+                        
+                        # Wait for content to load in the viewer
+                        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "#viewerContainer .page")))
+                        print(f"📄 Page content loaded for row {i+1}")
+                        
+                        # Additional wait for canvas to be rendered
+                        try:
+                            wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "#viewerContainer canvas")))
+                            print(f"🎨 Canvas rendered for row {i+1}")
+                        except:
+                            print(f"⚠️ Canvas not found for row {i+1}, continuing anyway")
+                        
+                    except Exception as e:
+                        print(f"⚠️ Viewer container not found or content not loaded for row {i+1}: {e}")
+                
+                # Wait a bit more for any additional content to load
+                time.sleep(3)
                 
                 # Look for PDFs on the current page after double-click
                 print(f"🔍 Looking for PDFs after double-clicking row {i+1}...")
@@ -334,13 +623,22 @@ try:
                 
                 # Click Save Image link and download PDF
                 print(f"💾 Clicking Save Image link for row {i+1}...")
-                click_save_image_and_download(driver, i+1, page_number)
+                pdf_path = click_save_image_and_download(driver, i+1, page_number)
+                if pdf_path:
+                    print(f"📦 Ready for processing: {pdf_path}")
+                    save_checkpoint(checkpoint, page_number, i+1, instrument)
+                    done_instruments.add(instrument)
+                else:
+                    print(f"⚠️ No PDF saved for row {i+1}; it will be retried on the next run")
+                    save_checkpoint(checkpoint, page_number, i+1, instrument, saved=False)
                 
                 # Wait a bit before moving to next row
                 time.sleep(1)
                 
             except Exception as e:
                 print(f"❌ Error processing row {i+1} on page {page_number}: {e}")
+                if instrument:
+                    save_checkpoint(checkpoint, page_number, i+1, instrument, saved=False)
                 continue
         
         try:
@@ -350,22 +648,26 @@ try:
             # Check if the "Next" button is disabled
             if "disabled" in next_button.get_attribute("class"):
                 print("🏁 Next button is disabled. End of results.")
+                clear_checkpoint(checkpoint)
                 break
                 
             # Click the "Next" button and wait for the table to become stale
             print("➡️ Clicking Next page...")
-            next_button.click()
-            wait.until(EC.staleness_of(table))
+            with browser_action(driver, URL, kind="next_page"):
+                next_button.click()
+                wait.until(EC.staleness_of(table))
             page_number += 1
             
         except NoSuchElementException:
             print("🏁 No 'Next' button found. Assuming single page of results.")
+            clear_checkpoint(checkpoint)
             break
         except Exception as e:
             print(f"❌ Error during pagination: {e}")
             break
     
     print(f"📁 PDFs saved in: {os.path.abspath(PDF_FOLDER)}")
+    print_metrics()
     
     # Optional: wait to see result
     time.sleep(5)
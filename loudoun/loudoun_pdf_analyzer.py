@@ -1,4 +1,5 @@
 import os
+import sys
 import glob
 import pandas as pd
 import tiktoken
@@ -8,6 +9,10 @@ import json
 from datetime import datetime
 from dotenv import load_dotenv
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.fields_first import analyze_document
+from shared.ocr_sidecar import extract_document_text
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -169,10 +174,12 @@ def main():
         pdf_name = os.path.basename(pdf_path)
         print(f"Processing: {pdf_name}")
         
-        # Extract text from PDF
-        text = extract_text_from_pdf(pdf_path)
+        # Extract text from the OCR sidecar (falls back to the PDF)
+        text = extract_document_text(pdf_path, extract_text_from_pdf)
         
-        if not text.strip():
+        # Analyze with OpenAI; fields-first documents get more pages OCR'd only while a field is still missing
+        analysis_result = analyze_document(text, pdf_path, lambda more: analyze_pdf_with_openai(more, pdf_name))
+        if analysis_result is None:
             print(f"No text extracted from {pdf_name}")
             result = {
                 "pdf_name": pdf_name,
@@ -184,9 +191,6 @@ def main():
             all_results.append(result)
             continue
         
-        # Analyze with OpenAI
-        analysis_result = analyze_pdf_with_openai(text, pdf_name)
-        
         # Add to results
         apn_raw = analysis_result.get("apn_taxid", "Not Found")
         result = {
@@ -7,9 +7,12 @@ import asyncio
 import json
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+from pydantic import BaseModel
 import uvicorn
 
+from shared.ocr_scheduler import OCRSlotScheduler
+
 app = FastAPI(
     title="PDF Scraping and Analysis API",
     description="API for scraping PDFs from Loudoun County, PWCBA, and Fairfax websites and analyzing them",
@@ -47,18 +50,29 @@ fairfax_process_status = {
     "results": None
 }
 
+# CPU slots for OCR shared by every county's processor, so overlapping jobs don't oversubscribe the cores
+ocr_scheduler = OCRSlotScheduler()
+# Where the processors started from here reach the scheduler endpoints below
+OCR_SCHEDULER_URL = os.environ.get("OCR_SCHEDULER_URL", "http://127.0.0.1:8000/ocr")
+
 def run_script(script_path: str, step_name: str) -> Dict[str, Any]:
     """Run a Python script and return the result"""
     try:
         print(f"🚀 Starting {step_name}...")
         
-        # Run the script
+        # Run the script, pointing its OCR at the shared scheduler
+        ocr_job_name = Path(script_path).parent.name
         result = subprocess.run(
             [sys.executable, script_path],
             capture_output=True,
             text=True,
-            cwd=os.path.dirname(script_path)
+            cwd=os.path.dirname(script_path),
+            env=dict(os.environ, OCR_SCHEDULER_URL=OCR_SCHEDULER_URL,
+                     OCR_JOB_NAME=ocr_job_name)
         )
+        # The script is gone; drop any slots it didn't get to release (killed, or exited without cleanup)
+        if ocr_scheduler.release_name(ocr_job_name):
+            print(f"⚠️  Released OCR slots left behind by {step_name}")
         
         if result.returncode == 0:
             print(f"✅ {step_name} completed successfully")
@@ -101,7 +115,8 @@ async def run_loudoun_process():
         print("📋 Step 1: Running web scraping...")
         loudoun_process_status["progress"] = 10
         loudoun_process_status["current_step"] = "Web Scraping (loudoun.py)"
-        step1_result = run_script(
+        step1_result = await asyncio.to_thread(
+            run_script,
             str(loudoun_dir / "loudoun.py"),
             "Web Scraping (loudoun.py)"
         )
@@ -113,7 +128,8 @@ async def run_loudoun_process():
         print("📋 Step 2: Running PDF processing...")
         loudoun_process_status["progress"] = 50
         loudoun_process_status["current_step"] = "PDF Processing (loudoun_pdf_processor.py)"
-        step2_result = run_script(
+        step2_result = await asyncio.to_thread(
+            run_script,
             str(loudoun_dir / "loudoun_pdf_processor.py"),
             "PDF Processing (loudoun_pdf_processor.py)"
         )
@@ -125,7 +141,8 @@ async def run_loudoun_process():
         print("📋 Step 3: Running PDF analysis...")
         loudoun_process_status["progress"] = 90
         loudoun_process_status["current_step"] = "PDF Analysis (loudoun_pdf_analyzer.py)"
-        step3_result = run_script(
+        step3_result = await asyncio.to_thread(
+            run_script,
             str(loudoun_dir / "loudoun_pdf_analyzer.py"),
             "PDF Analysis (loudoun_pdf_analyzer.py)"
         )
@@ -170,7 +187,8 @@ async def run_pwcba_process():
         print("📋 Step 1: Running PWCBA web scraping...")
         pwcba_process_status["progress"] = 10
         pwcba_process_status["current_step"] = "Web Scraping (pwcba.py)"
-        step1_result = run_script(
+        step1_result = await asyncio.to_thread(
+            run_script,
             str(pwcba_dir / "pwcba.py"),
             "Web Scraping (pwcba.py)"
         )
@@ -182,7 +200,8 @@ async def run_pwcba_process():
         print("📋 Step 2: Running PWCBA PDF processing...")
         pwcba_process_status["progress"] = 50
         pwcba_process_status["current_step"] = "PDF Processing (pwcba_pdf_processor.py)"
-        step2_result = run_script(
+        step2_result = await asyncio.to_thread(
+            run_script,
             str(pwcba_dir / "pwcba_pdf_processor.py"),
             "PDF Processing (pwcba_pdf_processor.py)"
         )
@@ -194,7 +213,8 @@ async def run_pwcba_process():
         print("📋 Step 3: Running PWCBA PDF analysis...")
         pwcba_process_status["progress"] = 90
         pwcba_process_status["current_step"] = "PDF Analysis (pwcba_pdf_analyzer.py)"
-        step3_result = run_script(
+        step3_result = await asyncio.to_thread(
+            run_script,
             str(pwcba_dir / "pwcba_pdf_analyzer.py"),
             "PDF Analysis (pwcba_pdf_analyzer.py)"
         )
@@ -239,7 +259,8 @@ async def run_fairfax_process():
         print("📋 Step 1: Running Fairfax web scraping...")
         fairfax_process_status["progress"] = 10
         fairfax_process_status["current_step"] = "Web Scraping (fairfax.py)"
-        step1_result = run_script(
+        step1_result = await asyncio.to_thread(
+            run_script,
             str(fairfax_dir / "fairfax.py"),
             "Web Scraping (fairfax.py)"
         )
@@ -251,7 +272,8 @@ async def run_fairfax_process():
         print("📋 Step 2: Running Fairfax PDF processing...")
         fairfax_process_status["progress"] = 50
         fairfax_process_status["current_step"] = "PDF Processing (fairfax_pdf_processor.py)"
-        step2_result = run_script(
+        step2_result = await asyncio.to_thread(
+            run_script,
             str(fairfax_dir / "fairfax_pdf_processor.py"),
             "PDF Processing (fairfax_pdf_processor.py)"
         )
@@ -263,7 +285,8 @@ async def run_fairfax_process():
         print("📋 Step 3: Running Fairfax image analysis...")
         fairfax_process_status["progress"] = 90
         fairfax_process_status["current_step"] = "Image Analysis (fairfax_image_analyzer.py)"
-        step3_result = run_script(
+        step3_result = await asyncio.to_thread(
+            run_script,
             str(fairfax_dir / "fairfax_image_analyzer.py"),
             "Image Analysis (fairfax_image_analyzer.py)"
         )
@@ -301,7 +324,8 @@ async def root():
             "/": "Home - API information",
             "/loudoun": "Run Loudoun County scraping and analysis process",
             "/pwcba": "Run PWCBA scraping and analysis process",
-            "/fairfax": "Run Fairfax scraping and analysis process"
+            "/fairfax": "Run Fairfax scraping and analysis process",
+            "/ocr/scheduler": "OCR CPU slot allocation across running jobs"
         }
     }
 
@@ -359,6 +383,41 @@ async def run_fairfax_scraping(background_tasks: BackgroundTasks):
         "status": "running"
     }
 
+class OCRJobRequest(BaseModel):
+    name: str = "ocr"
+    wanted: int = 1
+    remaining: Optional[int] = None
+
+class OCRJobProgress(BaseModel):
+    remaining: Optional[int] = None
+    wanted: Optional[int] = None
+
+@app.get("/ocr/scheduler")
+async def ocr_scheduler_status():
+    """CPU slots held by each running OCR job"""
+    return ocr_scheduler.status()
+
+@app.post("/ocr/jobs")
+async def register_ocr_job(request: OCRJobRequest):
+    """Called by a processor before it starts OCR; returns the CPU slots it may use"""
+    job_id, slots = ocr_scheduler.register(request.name, request.wanted, request.remaining)
+    return {"job_id": job_id, "slots": slots, "total_slots": ocr_scheduler.total_slots}
+
+@app.post("/ocr/jobs/{job_id}")
+async def update_ocr_job(job_id: int, progress: OCRJobProgress):
+    """Called by a processor as pages complete; returns its current share of CPU slots"""
+    try:
+        slots = ocr_scheduler.update(job_id, progress.remaining, progress.wanted)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown OCR job {job_id}")
+    return {"job_id": job_id, "slots": slots}
+
+@app.delete("/ocr/jobs/{job_id}")
+async def release_ocr_job(job_id: int):
+    """Called by a processor when its OCR is done"""
+    ocr_scheduler.release(job_id)
+    return {"job_id": job_id, "released": True}
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
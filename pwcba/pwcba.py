@@ -15,8 +15,12 @@ import json
 import csv
 import os
 import requests
+import sys
 from urllib.parse import urljoin
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.rate_control import limited_stream, limited_driver_get, browser_action, print_metrics
+
 def handle_recaptcha(driver):
     """Handle reCAPTCHA with multiple fallback methods - fully automated"""
     print("Attempting to handle reCAPTCHA automatically...")
@@ -100,6 +104,112 @@ def handle_recaptcha(driver):
     
     return False
 
+# Document types searched for
+DOC_TYPES = [
+    "LIS PENDENS",
+    "LIS PENDENS CORRECTED",
+    "LIS PENDENS RERECORDED",
+    "APPOINTMENT OF SUBSTITUTE TRUSTEE",
+    "APPTMT OF SUBSTITUTE TRUSTEE CORRECTED",
+    "APPTMT OF SUBSTITUTE TRUSTEE RERECORDED"
+]
+
+# Selects each document type through the form's own autocomplete list and fills the
+# recording date range, all inside the page. Reports the types it could not find.
+SET_SEARCH_FIELDS_SCRIPT = """
+var docTypes = arguments[0], startDate = arguments[1], endDate = arguments[2];
+var done = arguments[arguments.length - 1];
+var input = document.getElementById('field_selfservice_documentTypes');
+var list = document.getElementById('field_selfservice_documentTypes-aclist');
+var missing = [];
+if (!input || !list) { done({missing: docTypes, dates: false}); return; }
+
+function setDate(id, value) {
+    var el = document.getElementById(id);
+    if (!el) { return false; }
+    el.value = value;
+    el.dispatchEvent(new Event('input', {bubbles: true}));
+    el.dispatchEvent(new Event('change', {bubbles: true}));
+    return true;
+}
+
+function pick(i) {
+    if (i >= docTypes.length) {
+        var dates = setDate('field_RecordingDateID_DOT_StartDate', startDate)
+                 && setDate('field_RecordingDateID_DOT_EndDate', endDate);
+        done({missing: missing, dates: dates});
+        return;
+    }
+    var wanted = docTypes[i], tries = 0;
+    input.value = wanted;
+    input.dispatchEvent(new Event('input', {bubbles: true}));
+    input.dispatchEvent(new KeyboardEvent('keyup', {bubbles: true}));
+    (function poll() {
+        var items = list.querySelectorAll('li');
+        for (var k = 0; k < items.length; k++) {
+            if (items[k].textContent.replace(/\\s+/g, ' ').trim() === wanted) {
+                items[k].click();
+                pick(i + 1);
+                return;
+            }
+        }
+        if (++tries > 100) { missing.push(wanted); pick(i + 1); return; }
+        setTimeout(poll, 50);
+    })();
+}
+pick(0);
+"""
+
+def format_search_date(d):
+    """Format a date as M/D/YYYY without platform-specific strftime codes"""
+    return f"{d.month}/{d.day}/{d.year}"
+
+def submit_search_by_script(driver, doc_types, start_date, end_date):
+    """
+    Fill the DOCSEARCH114S2 form's document types and recording date range in a single script call.
+
+    Returns the document types that could not be selected and whether the dates were set.
+    """
+    try:
+        driver.set_script_timeout(30)
+        result = driver.execute_async_script(
+            SET_SEARCH_FIELDS_SCRIPT, doc_types, format_search_date(start_date), format_search_date(end_date))
+        print(f"Set {len(doc_types) - len(result['missing'])}/{len(doc_types)} document types by script.")
+        return result["missing"], result["dates"]
+    except Exception as e:
+        print(f"Could not set search fields by script: {e}")
+        return list(doc_types), False
+
+def select_document_types_by_typing(driver, doc_types):
+    """Select document types by typing into the autocomplete like a human (fallback)"""
+    doc_type_input = driver.find_element(By.ID, "field_selfservice_documentTypes")
+    for doc_type in doc_types:
+        # Clear and type the document type
+        doc_type_input.clear()
+        for char in doc_type:
+            doc_type_input.send_keys(char)
+            time.sleep(random.uniform(0.03, 0.12))  # Mimic human typing
+        time.sleep(random.uniform(0.5, 1.2))  # Wait for dropdown to populate
+        # Wait for the dropdown to be visible and select the item
+        item_xpath = f"//ul[@id='field_selfservice_documentTypes-aclist']//li[normalize-space(text())='{doc_type}']"
+        item = WebDriverWait(driver, 10).until(
+            EC.visibility_of_element_located((By.XPATH, item_xpath))
+        )
+        driver.execute_script("arguments[0].scrollIntoView(true);", item)
+        time.sleep(random.uniform(0.1, 0.3))
+        item.click()
+        time.sleep(random.uniform(0.7, 1.5))  # Wait before next selection
+
+def type_date_range(driver, start_date, end_date):
+    """Type the recording date range into the search form (fallback)"""
+    start_date_input = driver.find_element(By.ID, "field_RecordingDateID_DOT_StartDate")
+    end_date_input = driver.find_element(By.ID, "field_RecordingDateID_DOT_EndDate")
+    start_date_input.clear()
+    start_date_input.send_keys(format_search_date(start_date))
+    end_date_input.clear()
+    end_date_input.send_keys(format_search_date(end_date))
+    time.sleep(1)
+
 # Check for ffmpeg
 if not shutil.which("ffmpeg"):
     print("ffmpeg is not installed or not in your PATH. Please install ffmpeg and try again.")
@@ -147,7 +257,7 @@ driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
 
 try:
     # Open the website
-    driver.get(URL)
+    limited_driver_get(driver, URL)
     
     # Handle reCAPTCHA if present
     try:
@@ -236,7 +346,8 @@ try:
         
         # Click the Submit button
         submit_button = driver.find_element(By.ID, "loginSubmit")
-        submit_button.click()
+        with browser_action(driver, URL):
+            submit_button.click()
         print("Clicked login submit button.")
     except Exception as e:
         print(f"Error during login: {e}")
@@ -273,60 +384,29 @@ try:
     name_search_button = WebDriverWait(driver, 10).until(
         EC.element_to_be_clickable((By.XPATH, '//a[@href="/Web/search/DOCSEARCH114S2"]'))
     )
-    name_search_button.click()
+    with browser_action(driver, URL):
+        name_search_button.click()
 
     # Wait for the document type dropdown to be present
     WebDriverWait(driver, 10).until(
         EC.presence_of_element_located((By.ID, "field_selfservice_documentTypes-aclist"))
     )
 
-    # List of document types to select
-    doc_types = [
-        "LIS PENDENS",
-        "LIS PENDENS CORRECTED",
-        "LIS PENDENS RERECORDED",
-        "APPOINTMENT OF SUBSTITUTE TRUSTEE",
-        "APPTMT OF SUBSTITUTE TRUSTEE CORRECTED",
-        "APPTMT OF SUBSTITUTE TRUSTEE RERECORDED"
-    ]
-
-    # Open the dropdown and select each document type like a human
-    doc_type_input = driver.find_element(By.ID, "field_selfservice_documentTypes")
-    for doc_type in doc_types:
-        # Clear and type the document type
-        doc_type_input.clear()
-        for char in doc_type:
-            doc_type_input.send_keys(char)
-            time.sleep(random.uniform(0.03, 0.12))  # Mimic human typing
-        time.sleep(random.uniform(0.5, 1.2))  # Wait for dropdown to populate
-        # Wait for the dropdown to be visible and select the item
-        item_xpath = f"//ul[@id='field_selfservice_documentTypes-aclist']//li[normalize-space(text())='{doc_type}']"
-        item = WebDriverWait(driver, 10).until(
-            EC.visibility_of_element_located((By.XPATH, item_xpath))
-        )
-        driver.execute_script("arguments[0].scrollIntoView(true);", item)
-        time.sleep(random.uniform(0.1, 0.3))
-        item.click()
-        time.sleep(random.uniform(0.7, 1.5))  # Wait before next selection
-
-    # Set date range: from first of the month to today
+    # Set document types and the date range (1st of the month to today) in one script call,
+    # typing into the UI only for whatever the script could not set
     today = datetime.today()
-    first_of_month = today.replace(day=1)
-    start_date_str = first_of_month.strftime('%#m/%#d/%Y')
-    end_date_str = today.strftime('%#m/%#d/%Y')
-
-    # Input the dates
-    start_date_input = driver.find_element(By.ID, "field_RecordingDateID_DOT_StartDate")
-    end_date_input = driver.find_element(By.ID, "field_RecordingDateID_DOT_EndDate")
-    start_date_input.clear()
-    start_date_input.send_keys(start_date_str)
-    end_date_input.clear()
-    end_date_input.send_keys(end_date_str)
-    time.sleep(1)
+    missing_types, dates_set = submit_search_by_script(driver, DOC_TYPES, today.replace(day=1), today)
+    if missing_types:
+        print(f"Falling back to typing for document types: {missing_types}")
+        select_document_types_by_typing(driver, missing_types)
+    if not dates_set:
+        print("Falling back to typing the date range...")
+        type_date_range(driver, today.replace(day=1), today)
 
     # Click the Search button
     search_button = driver.find_element(By.ID, "searchButton")
-    search_button.click()
+    with browser_action(driver, URL):
+        search_button.click()
     time.sleep(5)
 
     # --- Fetch and parse all search results and save to CSV ---
@@ -435,7 +515,7 @@ try:
                     base_url = driver.current_url.split('/Web/')[0]
                     doc_url = base_url + doc_url
                 # Open the document page in the browser
-                driver.get(doc_url)
+                limited_driver_get(driver, doc_url)
                 time.sleep(3)  # Wait for page to load completely
                 
                 try:
@@ -463,15 +543,15 @@ try:
                             session.cookies.set(cookie['name'], cookie['value'])
                         
                         # Download the PDF
-                        response = session.get(pdf_url, stream=True)
-                        if response.status_code == 200:
-                            pdf_filename = f'pwcba_pdf/{doc_number}.pdf'
-                            with open(pdf_filename, 'wb') as f:
-                                for chunk in response.iter_content(chunk_size=8192):
-                                    f.write(chunk)
-                            print(f'Successfully downloaded PDF for document {doc_number}')
-                        else:
-                            print(f'Failed to download PDF for document {doc_number}. Status code: {response.status_code}')
+                        with limited_stream(session, pdf_url) as response:
+                            if response.status_code == 200:
+                                pdf_filename = f'pwcba_pdf/{doc_number}.pdf'
+                                with open(pdf_filename, 'wb') as f:
+                                    for chunk in response.iter_content(chunk_size=8192):
+                                        f.write(chunk)
+                                print(f'Successfully downloaded PDF for document {doc_number}')
+                            else:
+                                print(f'Failed to download PDF for document {doc_number}. Status code: {response.status_code}')
                     else:
                         print(f'Could not find PDF URL for document {doc_number}')
                         
@@ -527,11 +607,14 @@ try:
                             pass
                 
                 # Go back to the results page
-                driver.back()
+                with browser_action(driver, URL, kind="navigate"):
+                    driver.back()
                 time.sleep(2)
     else:
         print('No search results found.')
 
+    print_metrics()
+
 finally:
     # Close the browser
     driver.quit()
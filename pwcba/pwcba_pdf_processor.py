@@ -1,67 +1,12 @@
-import easyocr
-from pdf2image import convert_from_path
-from PIL import Image
-from fpdf import FPDF
-import numpy as np
-import re
 import os
+import sys
 import glob
 from pathlib import Path
 
-def process_pdf_to_searchable(input_pdf_path, output_pdf_path, reader):
-    """
-    Process a single PDF file to make it searchable using OCR
-    """
-    try:
-        print(f"Processing: {input_pdf_path}")
-        
-        # Convert PDF to images
-        pages = convert_from_path(input_pdf_path, 300)
-        
-        # Create new PDF
-        pdf = FPDF()
-        
-        for i, page in enumerate(pages):
-            print(f"  Processing page {i+1}/{len(pages)}")
-            
-            # Convert PIL image to numpy array for EasyOCR
-            img_array = np.array(page)
-            
-            # Extract text using EasyOCR
-            results = reader.readtext(img_array)
-            
-            # Combine all detected text and clean up special characters
-            text = '\n'.join([result[1] for result in results])
-            
-            # Clean up text to remove problematic Unicode characters
-            # Replace common problematic characters with ASCII equivalents
-            text = text.replace('€', 'EUR')
-            text = text.replace('£', 'GBP')
-            text = text.replace('$', 'USD')
-            text = text.replace('°', ' degrees')
-            text = text.replace('±', '+/-')
-            text = text.replace('×', 'x')
-            text = text.replace('÷', '/')
-            
-            # Remove any remaining non-ASCII characters
-            text = re.sub(r'[^\x00-\x7F]+', ' ', text)
-            
-            # Clean up extra whitespace
-            text = re.sub(r'\s+', ' ', text).strip()
-            
-            pdf.add_page()
-            pdf.set_auto_page_break(auto=True, margin=15)
-            pdf.set_font("Arial", size=12)
-            pdf.multi_cell(0, 10, text)
-        
-        # Save the searchable PDF
-        pdf.output(output_pdf_path)
-        print(f"  ✓ Completed: {output_pdf_path}")
-        return True
-        
-    except Exception as e:
-        print(f"  ✗ Error processing {input_pdf_path}: {str(e)}")
-        return False
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.fields_first import has_pending_pages
+from shared.ocr_pool import run_ocr_jobs, merge_stats
+from shared.pdf_ocr import print_ocr_stats
 
 def process_all_pdfs_in_folder(source_folder_path):
     """
@@ -80,7 +25,8 @@ def process_all_pdfs_in_folder(source_folder_path):
     
     # Find all PDF files in the source folder (excluding already searchable ones)
     pdf_files = [f for f in source_folder_path.glob("*.pdf") 
-                 if not f.name.endswith("_searchable.pdf")]
+                 if not f.name.endswith("_searchable.pdf")
+                 and not has_pending_pages(pwcba_pdf_folder / (f.stem + "_searchable.pdf"))]
     
     if not pdf_files:
         print(f"No original PDF files found in {source_folder_path}")
@@ -90,24 +36,21 @@ def process_all_pdfs_in_folder(source_folder_path):
     for pdf_file in pdf_files:
         print(f"  - {pdf_file.name}")
     
-    # Initialize EasyOCR reader once
-    print("Initializing EasyOCR reader...")
-    reader = easyocr.Reader(['en'])
-    print("EasyOCR reader initialized.")
-    
     print("\nStarting OCR processing...")
     
-    # Process each PDF file
-    for pdf_file in pdf_files:
-        # Create output filename with "_searchable" suffix in pwcba_pdf folder
-        output_filename = pdf_file.stem + "_searchable.pdf"
-        output_path = pwcba_pdf_folder / output_filename
-        
-        # Process the PDF
-        success = process_pdf_to_searchable(str(pdf_file), str(output_path), reader)
+    # OCR all PDFs across the worker pool; results come back in the same order as pdf_files
+    output_paths = [pwcba_pdf_folder / (pdf_file.stem + "_searchable.pdf") for pdf_file in pdf_files]
+    results = run_ocr_jobs([(str(pdf_file), str(output_path)) for pdf_file, output_path in zip(pdf_files, output_paths)])
+    
+    stats = {}
+    for pdf_file, output_path, (success, doc_stats) in zip(pdf_files, output_paths, results):
+        merge_stats(stats, doc_stats)
         
         # If searchable PDF was created successfully, delete the original
-        if success and output_path.exists():
+        # (fields-first documents keep it until the analyzer has OCR'd the pending pages)
+        if success and doc_stats.get("pending_pages"):
+            print(f"  ⏸ Keeping original for on-demand OCR of {doc_stats['pending_pages']} pages: {pdf_file.name}")
+        elif success and output_path.exists():
             try:
                 pdf_file.unlink()
                 print(f"  ✓ Deleted original: {pdf_file.name}")
@@ -119,6 +62,7 @@ def process_all_pdfs_in_folder(source_folder_path):
         print()  # Add blank line between files
     
     print("All PDF processing completed!")
+    print_ocr_stats(stats)
     print("Original PDF files have been deleted. Searchable PDFs are in the pwcba_pdf folder.")
 
 if __name__ == "__main__":
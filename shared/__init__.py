@@ -0,0 +1 @@
+"""Shared utilities used by the county scrapers, PDF processors and analyzers."""
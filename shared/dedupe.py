@@ -0,0 +1,196 @@
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Kept in the PDF folder; maps file name -> size, mtime and hashes so unchanged files are never re-read
+INDEX_FILE = ".dedupe_index.json"
+HASH_BUFFER_BYTES = 1024 * 1024
+HASH_WORKERS = min(8, (os.cpu_count() or 1) * 2)
+
+# Trailing timestamps/counters added when the same instrument is saved again,
+# e.g. _20250101_120000, _1717171717 or the _1, _2 from generate_unique_filename
+_SUFFIX_RE = re.compile(r'(?:[_\-\s]\d{1,14})+$')
+
+
+def file_sha256(path, buffer_bytes=HASH_BUFFER_BYTES):
+    """SHA-256 of a file read through one reusable large buffer"""
+    digest = hashlib.sha256()
+    buffer = bytearray(buffer_bytes)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            n = f.readinto(buffer)
+            if not n:
+                break
+            digest.update(view[:n])
+    return digest.hexdigest()
+
+
+def page_fingerprint(path):
+    """
+    Hash each page's content stream and images, ignoring document metadata.
+
+    Two saves of the same instrument differ in creation date and file ID
+    but render the same pages, so their fingerprints match.
+    """
+    import fitz  # PyMuPDF
+
+    pages = []
+    with fitz.open(str(path)) as doc:
+        for page in doc:
+            digest = hashlib.sha256(page.read_contents())
+            for image in page.get_images(full=True):
+                digest.update(doc.xref_stream_raw(image[0]) or b"")
+            pages.append(digest.hexdigest())
+    return pages
+
+
+def instrument_stem(path):
+    """File stem with trailing timestamp/counter suffixes removed"""
+    stem = Path(path).stem
+    return _SUFFIX_RE.sub("", stem) or stem
+
+
+def load_index(folder):
+    try:
+        with open(Path(folder) / INDEX_FILE, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_index(folder, index):
+    """Write the index atomically so an interrupted run can't corrupt it"""
+    path = Path(folder) / INDEX_FILE
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(index, f)
+    os.replace(tmp_path, path)
+
+
+def _entry(old_index, path):
+    """Index entry for a file, reused only while its size and mtime are unchanged"""
+    stat = path.stat()
+    entry = old_index.get(path.name)
+    if not entry or entry.get("size") != stat.st_size or entry.get("mtime_ns") != stat.st_mtime_ns:
+        entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    return entry
+
+
+def _fill(entries, key, fn, workers=HASH_WORKERS):
+    """Compute ``key`` for the entries missing it, across a thread pool; returns how many were computed"""
+    todo = [(path, entry) for path, entry in entries if key not in entry]
+    if not todo:
+        return 0
+    with ThreadPoolExecutor(max_workers=min(workers, len(todo))) as pool:
+        for (path, entry), value in zip(todo, pool.map(lambda item: fn(item[0]), todo)):
+            entry[key] = value
+    return len(todo)
+
+
+def _remove(keep, duplicates, label):
+    removed = []
+    print(f"  Found {label}s for {keep.name}:")
+    for duplicate in duplicates:
+        try:
+            duplicate.unlink()
+            print(f"    ✓ Removed {label}: {duplicate.name}")
+            removed.append(duplicate)
+        except Exception as e:
+            print(f"    ✗ Error removing {label} {duplicate.name}: {str(e)}")
+    return removed
+
+
+def _keep_order(item):
+    # Keep the shortest (original) name, then the oldest file
+    path, entry = item
+    return len(path.name), entry["mtime_ns"], path.name
+
+
+def remove_duplicate_pdfs(folder_path):
+    """
+    Remove duplicate PDF files, hashing only what is new since the last run.
+
+    Only files that share a size with another file are hashed, and hashes
+    are reused from the index while a file's size and mtime are unchanged.
+    Files whose names differ only by a timestamp/counter suffix are also
+    compared page by page, which catches the same instrument saved twice
+    with different PDF metadata.
+    """
+    folder_path = Path(folder_path).resolve()
+
+    if not folder_path.exists():
+        print(f"Error: Folder {folder_path} does not exist!")
+        return
+
+    pdf_files = list(folder_path.glob("*.pdf"))
+
+    if not pdf_files:
+        print(f"No PDF files found in {folder_path}")
+        return
+
+    print(f"Checking for duplicates among {len(pdf_files)} PDF files...")
+
+    # Entries for files that no longer exist are dropped by rebuilding the index from the listing
+    old_index = load_index(folder_path)
+    files = [(pdf_file, _entry(old_index, pdf_file)) for pdf_file in pdf_files]
+    index = {path.name: entry for path, entry in files}
+
+    # Exact duplicates: only files with the same size can match
+    by_size = {}
+    for path, entry in files:
+        by_size.setdefault(entry["size"], []).append((path, entry))
+    candidates = [item for group in by_size.values() if len(group) > 1 for item in group]
+    hashed = _fill(candidates, "sha256", file_sha256)
+
+    removed = []
+    by_hash = {}
+    for path, entry in candidates:
+        by_hash.setdefault(entry["sha256"], []).append((path, entry))
+    for group in by_hash.values():
+        if len(group) > 1:
+            group.sort(key=_keep_order)
+            removed += _remove(group[0][0], [path for path, _ in group[1:]], "duplicate")
+
+    # Near duplicates: the same instrument saved again under a suffixed name
+    remaining = [(path, entry) for path, entry in files if path not in removed]
+    by_stem = {}
+    for path, entry in remaining:
+        if not path.name.endswith("_searchable.pdf"):
+            by_stem.setdefault(instrument_stem(path), []).append((path, entry))
+    near_candidates = [item for group in by_stem.values() if len(group) > 1 for item in group]
+    fingerprinted = 0
+    for path, entry in near_candidates:
+        # PyMuPDF isn't safe to share across threads, and there are only a few of these
+        if "pages" not in entry:
+            try:
+                entry["pages"] = page_fingerprint(path)
+                fingerprinted += 1
+            except Exception as e:
+                print(f"  ⚠ Could not read pages of {path.name}: {e}")
+                entry["pages"] = None
+    for group in by_stem.values():
+        by_pages = {}
+        for path, entry in group:
+            if entry.get("pages"):
+                by_pages.setdefault(tuple(entry["pages"]), []).append((path, entry))
+        for same in by_pages.values():
+            if len(same) > 1:
+                same.sort(key=_keep_order)
+                removed += _remove(same[0][0], [path for path, _ in same[1:]], "near-duplicate")
+
+    for path in removed:
+        index.pop(path.name, None)
+    save_index(folder_path, index)
+
+    print(f"Hashed {hashed} and page-compared {fingerprinted} new or changed files; "
+          f"the rest were unique by size or unchanged since the last run")
+    if removed:
+        print(f"\nRemoved {len(removed)} duplicate PDF files.")
+    else:
+        print("No duplicate PDF files found.")
+
+    return len(removed)
@@ -0,0 +1,118 @@
+import os
+
+from shared.ocr_sidecar import pending_pages, read_sidecar, sidecar_path, skipped_page_record, write_sidecar
+from shared.pdf_ocr import FIELDS_FIRST_PAGES, ocr_pdf_pages, write_ocr_outputs
+
+# The fields the analyzers extract; a value in NOT_FOUND_VALUES means keep looking
+FIELDS = ("date", "owner_name", "address", "apn_taxid")
+NOT_FOUND_VALUES = ("Not found", "Not Found", "")
+
+# Pages OCR'd per on-demand round when OCR_FIELDS_FIRST_PAGES is not set
+DEFAULT_ROUND_PAGES = 2
+
+
+def has_pending_pages(pdf_path):
+    """True if the document's sidecar still lists pages waiting for OCR"""
+    sidecar = sidecar_path(pdf_path)
+    if not os.path.exists(sidecar):
+        return False
+    header, _ = read_sidecar(sidecar)
+    return bool(header.get("pending"))
+
+
+def missing_fields(result):
+    """Fields the analyzer has not found yet"""
+    return [field for field in FIELDS if result.get(field, "Not found") in NOT_FOUND_VALUES]
+
+
+def ocr_next_pages(pdf_path, count=None):
+    """
+    OCR the next ``count`` pending pages of a document and return their text.
+
+    The sidecar and searchable PDF are rewritten with the new pages. Once
+    nothing is pending, the original PDF is deleted as the processors would
+    have done. Returns None when no pages are pending.
+    """
+    sidecar = sidecar_path(pdf_path)
+    header, pages = read_sidecar(sidecar)
+    pending = header.get("pending") or []
+    if not pending:
+        return None
+    source_pdf = os.path.join(os.path.dirname(sidecar), header["source_pdf"])
+    batch = pending[:count or FIELDS_FIRST_PAGES or DEFAULT_ROUND_PAGES]
+    print(f"  OCR'ing pages {', '.join(str(i + 1) for i in batch)} on demand ({len(pending) - len(batch)} left after)")
+    # The analyzer's own reader and scheduler lease, shared with its image OCR
+    from shared.ocr_pool import get_leased_reader, idle_leased_reader
+    try:
+        reader = get_leased_reader().refresh(len(pending))
+        for i, record in zip(batch, ocr_pdf_pages(source_pdf, batch, reader)):
+            pages[i] = record
+    finally:
+        idle_leased_reader()
+    write_ocr_outputs(pages, source_pdf, pdf_path)
+    if not pending_pages(pages):
+        os.remove(source_pdf)
+        print(f"  ✓ All pages OCR'd, deleted original: {os.path.basename(source_pdf)}")
+    return '\n'.join(pages[i]["text"] for i in batch)
+
+
+def finish_pending_pages(pdf_path):
+    """
+    Stop waiting on a fields-first document's pending pages once the analysis is done.
+
+    They are marked skipped in the sidecar and the original PDF, kept only
+    so they could be OCR'd on demand, is deleted.
+    """
+    sidecar = sidecar_path(pdf_path)
+    header, pages = read_sidecar(sidecar)
+    pending = header.get("pending")
+    if not pending:
+        return
+    for i in pending:
+        pages[i] = skipped_page_record()
+    write_sidecar(pages, sidecar, document=header.get("document"))
+    source_pdf = os.path.join(os.path.dirname(sidecar), header["source_pdf"])
+    if os.path.exists(source_pdf):
+        os.remove(source_pdf)
+    print(f"  ✓ Every field found, {len(pending)} pages left un-OCR'd; deleted original: {os.path.basename(source_pdf)}")
+
+
+def analyze_document(text, pdf_path, analyze):
+    """
+    Analyze a document's text, OCR'ing more pages of a fields-first document while a field is missing.
+
+    ``analyze`` takes text and returns a dict of the FIELDS. Returns None
+    when there is no text and no pages left to OCR. Pages still pending
+    after the analysis are never needed, so they are released with
+    finish_pending_pages.
+    """
+    pending = has_pending_pages(pdf_path)
+    if not text.strip() and not pending:
+        return None
+    result = analyze(text) if text.strip() else {}
+    if pending:
+        complete_missing_fields(result, pdf_path, analyze)
+        finish_pending_pages(pdf_path)
+    return result
+
+
+def complete_missing_fields(result, pdf_path, analyze):
+    """
+    Fill fields the analyzer could not find by OCR'ing more pages on demand.
+
+    ``analyze`` is called with the text of each newly OCR'd round of pages
+    and must return a dict with the same fields; only missing fields are
+    taken from it. Stops as soon as every field is found or nothing is
+    pending.
+    """
+    while missing_fields(result):
+        text = ocr_next_pages(pdf_path)
+        if text is None:
+            break
+        if not text.strip():
+            continue
+        more = analyze(text)
+        for field in missing_fields(result):
+            if more.get(field, "Not found") not in NOT_FOUND_VALUES:
+                result[field] = more[field]
+    return result
@@ -0,0 +1,177 @@
+import io
+import os
+import shutil
+import subprocess
+
+import numpy as np
+
+# Engines behind the reader the processors use; pick one with OCR_BACKEND
+OCR_BACKENDS = ("easyocr", "easyocr-onnx", "tesseract")
+DEFAULT_OCR_BACKEND = os.environ.get("OCR_BACKEND", "easyocr")
+
+TESSERACT_CMD = os.environ.get("TESSERACT_CMD", "tesseract")
+# Page segmentation mode 3: fully automatic layout, which suits deed pages
+TESSERACT_PSM = os.environ.get("TESSERACT_PSM", "3")
+
+
+def load_image(img):
+    """Accept an RGB/gray array or an image file path, like EasyOCR does"""
+    if isinstance(img, (str, os.PathLike)):
+        from PIL import Image
+
+        with Image.open(img) as image:
+            return np.asarray(image.convert("RGB"))
+    return img
+
+
+class EasyOCRBackend:
+    """
+    EasyOCR's CRAFT detector and CRNN recognizer on torch.
+
+    Thin wrapper around easyocr.Reader so every backend has the same
+    readtext/readtext_batched calls and a ``name`` for cache keys.
+    """
+
+    name = "easyocr"
+
+    def __init__(self, lang_list=("en",), threads=None):
+        if threads:
+            from shared.ocr_pool import pin_torch_threads
+            pin_torch_threads(threads)
+        import easyocr
+
+        self.lang_list = list(lang_list)
+        self.reader = easyocr.Reader(self.lang_list, gpu=False)
+
+    def set_threads(self, threads):
+        from shared.ocr_pool import pin_torch_threads
+        pin_torch_threads(threads)
+
+    def readtext(self, img, batch_size=1, **kwargs):
+        return self.reader.readtext(img, batch_size=batch_size, **kwargs)
+
+    def readtext_batched(self, images, batch_size=1, **kwargs):
+        return self.reader.readtext_batched(images, batch_size=batch_size, **kwargs)
+
+
+class EasyOCROnnxBackend(EasyOCRBackend):
+    """
+    EasyOCR with its detector and recognizer running under ONNX Runtime.
+
+    The models are exported once to OCR_ONNX_DIR and int8-quantized unless
+    OCR_ONNX_QUANTIZE=0; sessions are created once per worker process.
+    EasyOCR's own pre- and post-processing is unchanged.
+    """
+
+    name = "easyocr-onnx"
+
+    def __init__(self, lang_list=("en",), threads=None, quantize=None):
+        from shared.onnx_ocr import ONNX_QUANTIZE, use_onnx_models
+
+        if threads:
+            from shared.ocr_pool import pin_torch_threads
+            pin_torch_threads(threads)
+        import easyocr
+
+        self.lang_list = list(lang_list)
+        # Plain float weights: torch's own dynamic quantization doesn't export to ONNX
+        self.quantize = ONNX_QUANTIZE if quantize is None else quantize
+        reader = easyocr.Reader(self.lang_list, gpu=False, quantize=False)
+        self.reader = use_onnx_models(reader, threads, self.quantize)
+        # int8 and float32 results differ slightly, so they are cached separately
+        self.name = f"{EasyOCROnnxBackend.name}-{'int8' if self.quantize else 'fp32'}"
+
+    def set_threads(self, threads):
+        from shared.onnx_ocr import use_onnx_models
+
+        super().set_threads(threads)
+        # Session thread counts are fixed, so switch to sessions created for the new count
+        use_onnx_models(self.reader, threads, self.quantize)
+
+    @staticmethod
+    def prepare(lang_list=("en",)):
+        """Export (and quantize) the ONNX models once, before any worker process loads them"""
+        from shared.onnx_ocr import model_paths
+
+        model_paths(lang_list)
+
+
+class TesseractBackend:
+    """
+    Tesseract through the local ``tesseract`` binary.
+
+    Pages go over stdin as PNG and the TSV output is grouped into lines so
+    results look like EasyOCR's (box, text, confidence) tuples.
+    """
+
+    name = "tesseract"
+
+    def __init__(self, lang_list=("en",), threads=None):
+        if not shutil.which(TESSERACT_CMD):
+            raise RuntimeError(f"Tesseract binary {TESSERACT_CMD!r} not found; "
+                               f"install tesseract-ocr or set TESSERACT_CMD")
+        self.lang_list = list(lang_list)
+        # Tesseract's language codes are ISO 639-2
+        self.lang = "+".join("eng" if lang == "en" else lang for lang in self.lang_list)
+        self.env = dict(os.environ, OMP_THREAD_LIMIT=str(threads or 1))
+
+    def set_threads(self, threads):
+        self.env["OMP_THREAD_LIMIT"] = str(threads)
+
+    def _png(self, img):
+        from PIL import Image
+
+        buffer = io.BytesIO()
+        Image.fromarray(img).save(buffer, format="PNG", compress_level=1)
+        return buffer.getvalue()
+
+    def readtext(self, img, batch_size=None, **kwargs):
+        output = subprocess.run(
+            [TESSERACT_CMD, "stdin", "stdout", "-l", self.lang, "--psm", TESSERACT_PSM, "tsv"],
+            input=self._png(load_image(img)), capture_output=True, env=self.env, check=True
+        ).stdout.decode("utf-8", errors="replace")
+        return self._parse_tsv(output)
+
+    def readtext_batched(self, images, batch_size=None, **kwargs):
+        return [self.readtext(img) for img in images]
+
+    @staticmethod
+    def _parse_tsv(tsv):
+        lines = {}
+        rows = tsv.splitlines()
+        for row in rows[1:]:
+            cols = row.split("\t")
+            # level 5 is a word; conf -1 marks layout-only rows
+            if len(cols) < 12 or cols[0] != "5" or not cols[11].strip() or float(cols[10]) < 0:
+                continue
+            left, top, width, height = (int(c) for c in cols[6:10])
+            lines.setdefault(tuple(cols[2:5]), []).append((left, top, left + width, top + height,
+                                                           cols[11], float(cols[10]) / 100))
+        results = []
+        for words in lines.values():
+            x0, y0 = min(w[0] for w in words), min(w[1] for w in words)
+            x1, y1 = max(w[2] for w in words), max(w[3] for w in words)
+            box = [[x0, y0], [x1, y0], [x1, y1], [x0, y1]]
+            results.append((box, " ".join(w[4] for w in words), sum(w[5] for w in words) / len(words)))
+        return results
+
+
+_BACKEND_CLASSES = {
+    "easyocr": EasyOCRBackend,
+    "easyocr-onnx": EasyOCROnnxBackend,
+    "tesseract": TesseractBackend,
+}
+
+
+def create_backend(name=DEFAULT_OCR_BACKEND, threads=None, lang_list=("en",)):
+    """Create an OCR backend by name"""
+    if name not in _BACKEND_CLASSES:
+        raise ValueError(f"Unknown OCR backend {name!r}, expected one of {OCR_BACKENDS}")
+    return _BACKEND_CLASSES[name](lang_list, threads)
+
+
+def prepare_backend(name=DEFAULT_OCR_BACKEND, lang_list=("en",)):
+    """One-time setup a backend needs before worker processes create it; most need none"""
+    prepare = getattr(_BACKEND_CLASSES.get(name), "prepare", None)
+    if prepare:
+        prepare(lang_list)
@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# SQLite file holding OCR results by page hash; set OCR_CACHE_PATH to "" to turn the cache off
+DEFAULT_CACHE_PATH = os.environ.get("OCR_CACHE_PATH", os.path.join(ROOT, "ocr_cache.sqlite"))
+# Least recently used pages are evicted once the stored results exceed this many MB
+DEFAULT_CACHE_MB = int(os.environ.get("OCR_CACHE_MB", "512"))
+# How many writes between size checks; eviction scans the table so it isn't done every put
+EVICT_EVERY = 64
+
+# Timing and bookkeeping fields that describe one run, not the page
+_RUN_FIELDS = ("dpi", "ocr_ms", "preprocess_ms", "rescanned", "cached")
+
+
+def page_key(img, settings):
+    """Hash of a rasterized page's pixels, its shape and the OCR settings that produced the result"""
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(repr((img.shape, str(img.dtype), settings)).encode())
+    digest.update(memoryview(np.ascontiguousarray(img)).cast("B"))
+    return digest.hexdigest()
+
+
+class OCRCache:
+    """
+    Disk-backed OCR results keyed by page hash, with size-bounded LRU eviction.
+
+    Safe to share between the worker processes of the OCR pool: each process
+    opens its own connection and SQLite's WAL journal serializes writers.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_mb=DEFAULT_CACHE_MB):
+        self.path = path
+        self.max_bytes = max_mb * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._puts = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS ocr_cache ("
+            "key TEXT PRIMARY KEY, record TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ocr_cache_last_used ON ocr_cache (last_used)")
+
+    def get(self, key):
+        """Return the cached page record for a key, or None"""
+        with self._lock:
+            row = self._conn.execute("SELECT record FROM ocr_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute("UPDATE ocr_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+        record = json.loads(row[0])
+        record["cached"] = True
+        return record
+
+    def put(self, key, record):
+        """Store a page record, dropping per-run fields like timings"""
+        value = json.dumps({k: v for k, v in record.items() if k not in _RUN_FIELDS}, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO ocr_cache (key, record, size, last_used) VALUES (?, ?, ?, ?)",
+                               (key, value, len(value), time.time()))
+            self._puts += 1
+            if self._puts % EVICT_EVERY == 0:
+                self._evict()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM ocr_cache").fetchone()[0]
+        while total > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, size FROM ocr_cache ORDER BY last_used LIMIT ?", (EVICT_EVERY,)
+            ).fetchall()
+            if not rows:
+                break
+            self._conn.executemany("DELETE FROM ocr_cache WHERE key = ?", [(key,) for key, _ in rows])
+            self.evictions += len(rows)
+            total -= sum(size for _, size in rows)
+
+    def metrics(self):
+        """Entries and bytes stored, plus this process's hit/miss/eviction counters"""
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM ocr_cache").fetchone()
+        return {
+            "path": self.path,
+            "entries": entries,
+            "size_mb": round(size / (1024 * 1024), 1),
+            "max_mb": round(self.max_bytes / (1024 * 1024), 1),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_cache = None
+_cache_pid = None
+
+
+def get_cache():
+    """Return this process's OCRCache, or None when OCR_CACHE_PATH is empty"""
+    global _cache, _cache_pid
+    if not DEFAULT_CACHE_PATH:
+        return None
+    if _cache is None or _cache_pid != os.getpid():
+        _cache = OCRCache()
+        _cache_pid = os.getpid()
+    return _cache
+
+
+def reader_settings(reader, preprocess):
+    """The OCR settings that change a page's result, as part of its cache key"""
+    name = getattr(reader, "name", None) or type(reader).__name__
+    return name, tuple(getattr(reader, "lang_list", ()) or ()), tuple(preprocess)
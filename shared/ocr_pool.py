@@ -0,0 +1,327 @@
+import atexit
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from shared.ocr_backends import DEFAULT_OCR_BACKEND, create_backend, prepare_backend
+from shared.ocr_scheduler import OCR_JOB_NAME, OCRSlotLease
+from shared.ocr_service import OCR_SERVICE_SOCKET, OCRServiceClient
+from shared.pdf_ocr import (DEFAULT_LOW_DPI, DEFAULT_RASTER_BACKEND, MIN_PAGE_CONFIDENCE, OCR_PAGE_BATCH,
+                            OCR_RECOGNITION_BATCH, add_page_stats, ocr_pdf_pages, plan_page_records,
+                            write_ocr_outputs)
+
+# Rough resident size of one worker: OCR models (EasyOCR detector + recognizer) + a page in flight
+WORKER_MEMORY_MB = int(os.environ.get("OCR_WORKER_MEMORY_MB", "1500"))
+
+# Set in each worker process by _init_worker
+_reader = None
+# This process's reader for OCR outside run_ocr_jobs; see get_leased_reader
+_leased_reader = None
+
+
+def available_memory_mb():
+    """
+    Memory available to new processes in MB, or None where we can't tell.
+
+    Uses MemAvailable from /proc/meminfo, which counts reclaimable page
+    cache; sysconf's free pages don't, and read low on a box that has been
+    reading a lot of PDFs.
+    """
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") // (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def default_worker_count():
+    """
+    Number of OCR workers for this box.
+
+    Uses OCR_WORKERS when set, otherwise as many workers as there are CPUs
+    and memory for at WORKER_MEMORY_MB each.
+    """
+    if os.environ.get("OCR_WORKERS"):
+        return max(1, int(os.environ["OCR_WORKERS"]))
+    workers = os.cpu_count() or 1
+    memory_mb = available_memory_mb()
+    if memory_mb:
+        workers = min(workers, memory_mb // WORKER_MEMORY_MB)
+    return max(1, workers)
+
+
+def threads_per_worker(workers):
+    """Torch intra-op threads for each worker so workers x threads doesn't exceed the CPUs"""
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+def pin_torch_threads(threads):
+    """Limit torch and the BLAS/OpenMP libraries under it to a number of threads"""
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    import torch
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Can only be set before torch has run any parallel work
+        pass
+
+
+def create_reader(threads=None, backend=DEFAULT_OCR_BACKEND):
+    """
+    Create the OCR backend selected by OCR_BACKEND, limited to ``threads`` CPU threads when given.
+
+    With OCR_SERVICE_SOCKET set, returns a client of the shared OCR service
+    instead, so this process doesn't load its own models.
+    """
+    if OCR_SERVICE_SOCKET:
+        return OCRServiceClient(OCR_SERVICE_SOCKET)
+    return create_backend(backend, threads)
+
+
+class LeasedReader:
+    """
+    An in-process reader whose CPU threads follow the OCR scheduler.
+
+    Starts with the lease's slots (or the whole machine without a
+    scheduler). ``refresh`` reports the pages left and moves the reader to
+    its current share, so a long serial run gives cores back when other
+    counties' jobs start and takes them again when they finish.
+    """
+
+    def __init__(self, lease=None, wanted=None):
+        self.lease = lease
+        self.wanted = wanted or os.cpu_count() or 1
+        self.threads = max(1, lease.slots) if lease else threads_per_worker(1)
+        if OCR_SERVICE_SOCKET:
+            print(f"Using OCR service at {OCR_SERVICE_SOCKET}; no models loaded in this process")
+        else:
+            print(f"Initializing {DEFAULT_OCR_BACKEND} OCR backend ({self.threads} threads)...")
+        self.reader = create_reader(self.threads)
+
+    def refresh(self, remaining=None):
+        """Report progress to the scheduler and return the reader, re-pinned to the current share"""
+        if self.lease:
+            threads = max(1, self.lease.update(remaining, wanted=self.wanted))
+            # The OCR service client runs no models here, so it has no threads to move
+            if threads != self.threads and hasattr(self.reader, "set_threads"):
+                self.reader.set_threads(threads)
+            self.threads = threads
+        return self.reader
+
+    def idle(self):
+        """Hand the slots back between OCR rounds; the next ``refresh`` asks for them again"""
+        if self.lease:
+            self.lease.update(0, wanted=1)
+
+
+def get_leased_reader(name=OCR_JOB_NAME):
+    """
+    This process's LeasedReader for OCR outside run_ocr_jobs (the analyzers), created on first use.
+
+    Every caller in the process shares it, so a process holds one model and
+    one scheduler lease; the lease is released when the process exits.
+    Call ``idle_leased_reader`` after each round of OCR so the slots aren't
+    held while the analyzer does other work.
+    """
+    global _leased_reader
+    if _leased_reader is None:
+        lease = OCRSlotLease.acquire(wanted=os.cpu_count() or 1, name=name)
+        if lease:
+            atexit.register(lease.release)
+        _leased_reader = LeasedReader(lease)
+    return _leased_reader
+
+
+def idle_leased_reader():
+    """Hand the shared reader's slots back between OCR rounds, if it was ever created"""
+    if _leased_reader:
+        _leased_reader.idle()
+
+
+def _init_worker(threads):
+    """Pool initializer: load one reader per worker process"""
+    global _reader
+    _reader = create_reader(threads)
+
+
+def _ocr_pages_unit(input_pdf_path, page_indexes, dpi, raster_backend, page_batch, batch_size, low_dpi,
+                    min_confidence):
+    """Pool task: rasterize and OCR a few pages of one document with this worker's reader"""
+    return ocr_pdf_pages(input_pdf_path, page_indexes, _reader, dpi, raster_backend, page_batch, batch_size,
+                         low_dpi, min_confidence)
+
+
+class _Document:
+    """Per-document bookkeeping while its pages are spread across the pool"""
+
+    def __init__(self, input_pdf_path, output_pdf_path):
+        self.input_pdf_path = input_pdf_path
+        self.output_pdf_path = output_pdf_path
+        self.page_records, self.ocr_pages = plan_page_records(input_pdf_path)
+        self.remaining = len(self.ocr_pages)
+        self.failed = False
+
+    def finish(self):
+        """Write the searchable PDF and sidecar once the last page is in; returns (success, stats)"""
+        if self.failed:
+            print(f"  ✗ Error processing {self.input_pdf_path}: one or more pages failed OCR")
+            return False, {}
+        try:
+            write_ocr_outputs(self.page_records, self.input_pdf_path, self.output_pdf_path)
+        except Exception as e:
+            print(f"  ✗ Error writing {self.output_pdf_path}: {e}")
+            return False, {}
+        print(f"  ✓ Completed: {self.output_pdf_path} ({len(self.page_records)} pages, {len(self.ocr_pages)} OCR'd)")
+        stats = {}
+        add_page_stats(stats, self.page_records)
+        return True, stats
+
+
+def run_ocr_jobs(jobs, workers=None, dpi=300, raster_backend=DEFAULT_RASTER_BACKEND,
+                 page_batch=OCR_PAGE_BATCH, batch_size=OCR_RECOGNITION_BATCH, low_dpi=DEFAULT_LOW_DPI,
+                 min_confidence=MIN_PAGE_CONFIDENCE):
+    """
+    OCR documents across a pool of worker processes with pages as work units.
+
+    ``jobs`` is a list of (input_pdf_path, output_pdf_path). Pages from all
+    documents are queued longest document first so one long deed doesn't
+    leave a single worker running at the end; each searchable PDF is written
+    as soon as its last page completes. A unit holds up to ``page_batch``
+    consecutive pages so they can share a detector batch; with ``low_dpi``
+    each unit re-reads its own low-confidence pages at ``dpi``. Returns a
+    list of (success, stats) in the same order as ``jobs``.
+
+    When main.py's OCR scheduler is configured (OCR_SCHEDULER_URL), CPU
+    slots are leased from it: workers x torch threads are sized from the
+    grant, and fewer units are kept in flight while other counties' jobs
+    hold part of the machine.
+    """
+    if not jobs:
+        return []
+    workers = workers or default_worker_count()
+    lease = OCRSlotLease.acquire(wanted=os.cpu_count() or 1)
+    try:
+        return _run_ocr_jobs(jobs, workers, lease, dpi, raster_backend, page_batch, batch_size, low_dpi,
+                             min_confidence)
+    finally:
+        if lease:
+            lease.release()
+
+
+def _run_ocr_jobs(jobs, workers, lease, dpi, raster_backend, page_batch, batch_size, low_dpi, min_confidence):
+    if lease:
+        workers = min(workers, max(1, lease.slots))
+
+    # Plan every document up front: text-layer pages are settled here, the rest become work units
+    results = [None] * len(jobs)
+    documents = {}
+    for doc_id, (input_pdf_path, output_pdf_path) in enumerate(jobs):
+        try:
+            documents[doc_id] = _Document(input_pdf_path, output_pdf_path)
+        except Exception as e:
+            print(f"  ✗ Error processing {input_pdf_path}: {e}")
+            results[doc_id] = (False, {})
+    for doc_id, document in documents.items():
+        if document.remaining == 0:
+            results[doc_id] = document.finish()
+
+    if workers == 1:
+        _run_serial(documents, results, lease, dpi, raster_backend, page_batch, batch_size, low_dpi,
+                    min_confidence)
+        return results
+
+    order = sorted((d for d in documents if documents[d].remaining), key=lambda d: -documents[d].remaining)
+    units = []
+    for doc_id in order:
+        ocr_pages = documents[doc_id].ocr_pages
+        for start in range(0, len(ocr_pages), max(1, page_batch)):
+            units.append((doc_id, ocr_pages[start:start + max(1, page_batch)]))
+    if not units:
+        return results
+
+    remaining_pages = sum(len(pages) for _, pages in units)
+    workers = min(workers, len(units))
+    if lease:
+        workers = min(workers, max(1, lease.update(remaining_pages)))
+    threads = max(1, lease.slots // workers) if lease else threads_per_worker(workers)
+    print(f"Starting {workers} {DEFAULT_OCR_BACKEND} OCR workers with {threads} threads each "
+          f"for {sum(len(pages) for _, pages in units)} pages...")
+    if not OCR_SERVICE_SOCKET:
+        # Model exports happen here, once, rather than in every worker at the same time
+        prepare_backend(DEFAULT_OCR_BACKEND)
+    # spawn, not fork: torch's thread pools don't survive a fork
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker, initargs=(threads,)) as pool:
+        # Units are submitted as workers free up so the number in flight can follow the scheduler
+        futures = {}
+        next_unit = 0
+        in_flight = workers
+        while futures or next_unit < len(units):
+            while next_unit < len(units) and len(futures) < in_flight:
+                doc_id, page_indexes = units[next_unit]
+                next_unit += 1
+                future = pool.submit(_ocr_pages_unit, documents[doc_id].input_pdf_path, page_indexes, dpi,
+                                     raster_backend, page_batch, batch_size, low_dpi, min_confidence)
+                futures[future] = (doc_id, page_indexes)
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                doc_id, page_indexes = futures.pop(future)
+                document = documents[doc_id]
+                try:
+                    for page_index, record in zip(page_indexes, future.result()):
+                        document.page_records[page_index] = record
+                except Exception as e:
+                    print(f"  ✗ OCR failed for pages {page_indexes[0] + 1}-{page_indexes[-1] + 1} "
+                          f"of {document.input_pdf_path}: {e}")
+                    document.failed = True
+                document.remaining -= len(page_indexes)
+                remaining_pages -= len(page_indexes)
+                if document.remaining == 0:
+                    results[doc_id] = document.finish()
+            if lease:
+                # Other counties' jobs may have started or finished; idle workers leave their cores to them
+                units_left = len(units) - next_unit + len(futures)
+                slots = lease.update(remaining_pages, wanted=min(workers, units_left) * threads)
+                in_flight = min(workers, max(1, slots // threads))
+    return results
+
+
+def _run_serial(documents, results, lease, dpi, raster_backend, page_batch, batch_size, low_dpi, min_confidence):
+    """OCR documents one after another in this process, following the scheduler between documents"""
+    remaining_pages = sum(document.remaining for document in documents.values())
+    if not remaining_pages:
+        return
+    leased = LeasedReader(lease)
+    for doc_id, document in documents.items():
+        if not document.remaining:
+            continue
+        # Other counties' jobs may have started or finished since the last document
+        reader = leased.refresh(remaining_pages)
+        print(f"Processing: {document.input_pdf_path} ({document.remaining} pages, {leased.threads} threads)")
+        try:
+            records = ocr_pdf_pages(document.input_pdf_path, document.ocr_pages, reader, dpi, raster_backend,
+                                    page_batch, batch_size, low_dpi, min_confidence)
+            for page_index, record in zip(document.ocr_pages, records):
+                document.page_records[page_index] = record
+        except Exception as e:
+            print(f"  ✗ OCR failed for {document.input_pdf_path}: {e}")
+            document.failed = True
+        remaining_pages -= document.remaining
+        document.remaining = 0
+        results[doc_id] = document.finish()
+
+
+def merge_stats(total, stats):
+    """Add one document's page counts into a running total"""
+    for key, value in stats.items():
+        total[key] = total.get(key, 0) + value
+    return total
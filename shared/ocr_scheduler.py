@@ -0,0 +1,176 @@
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+
+# Set by main.py for the processors it runs; unset, each processor sizes its OCR pool on its own
+OCR_SCHEDULER_URL = os.environ.get("OCR_SCHEDULER_URL")
+# How this processor shows up in the scheduler (main.py passes the county)
+OCR_JOB_NAME = os.environ.get("OCR_JOB_NAME", "ocr")
+# Jobs that haven't reported for this long are presumed dead (killed, OOM) and lose their slots
+OCR_JOB_TIMEOUT = float(os.environ.get("OCR_JOB_TIMEOUT", "120"))
+# Leases report in at least this often, even between pages, so live jobs never time out
+OCR_LEASE_HEARTBEAT = OCR_JOB_TIMEOUT / 4
+
+
+class OCRSlotScheduler:
+    """
+    Shares the machine's CPU slots (one per core) between concurrent OCR jobs.
+
+    Slots are handed out one at a time to the job holding the fewest that
+    still wants more, so concurrent jobs get equal shares and a job that
+    can't use its share leaves the rest to the others. Ties, including the
+    slots left over after an even split, go to the job closest to
+    completion (fewest pages left). Allocations are recomputed on every
+    call, so jobs pick up their new share when they next report progress.
+    Jobs silent for longer than ``job_timeout`` are dropped, so a processor
+    that died without releasing doesn't keep its share.
+    """
+
+    def __init__(self, total_slots=None, job_timeout=OCR_JOB_TIMEOUT):
+        self.total_slots = total_slots or os.cpu_count() or 1
+        self.job_timeout = job_timeout
+        self._jobs = {}
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def _expire(self):
+        cutoff = time.time() - self.job_timeout
+        for job_id in [j for j, job in self._jobs.items() if job["seen"] < cutoff]:
+            job = self._jobs.pop(job_id)
+            print(f"⚠️  OCR job {job_id} ({job['name']}) stopped reporting; releasing its slots")
+
+    def _allocate(self):
+        self._expire()
+        # Closest to completion first; jobs that haven't reported pages yet go last, then oldest first
+        order = sorted(self._jobs, key=lambda j: (self._jobs[j]["remaining"] is None,
+                                                  self._jobs[j]["remaining"] or 0, self._jobs[j]["started"]))
+        slots = {job_id: 0 for job_id in order}
+        free = self.total_slots
+        while free:
+            wanting = [j for j in order if slots[j] < self._jobs[j]["wanted"]]
+            if not wanting:
+                break
+            # min() keeps the first of equals, so ties go by the order above
+            job_id = min(wanting, key=lambda j: slots[j])
+            slots[job_id] += 1
+            free -= 1
+        return slots
+
+    def register(self, name, wanted, remaining=None):
+        """Add a job; returns (job_id, slots)"""
+        with self._lock:
+            job_id = self._next_id
+            self._next_id += 1
+            now = time.time()
+            self._jobs[job_id] = {"name": name, "wanted": max(1, wanted), "remaining": remaining,
+                                  "started": now, "seen": now}
+            return job_id, self._allocate()[job_id]
+
+    def update(self, job_id, remaining=None, wanted=None):
+        """Record a job's progress and return its current slots"""
+        with self._lock:
+            self._expire()
+            job = self._jobs[job_id]
+            job["seen"] = time.time()
+            if remaining is not None:
+                job["remaining"] = remaining
+            if wanted is not None:
+                job["wanted"] = max(1, wanted)
+            return self._allocate()[job_id]
+
+    def release(self, job_id):
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    def release_name(self, name):
+        """Drop every job registered under ``name``; returns how many there were"""
+        with self._lock:
+            job_ids = [j for j, job in self._jobs.items() if job["name"] == name]
+            for job_id in job_ids:
+                del self._jobs[job_id]
+            return len(job_ids)
+
+    def status(self):
+        with self._lock:
+            slots = self._allocate()
+            jobs = [dict(job, id=job_id, slots=slots[job_id]) for job_id, job in self._jobs.items()]
+        return {"total_slots": self.total_slots, "allocated": sum(slots.values()), "jobs": jobs}
+
+
+def _post(path, body=None, method="POST"):
+    request = urllib.request.Request(f"{OCR_SCHEDULER_URL.rstrip('/')}{path}", method=method,
+                                     data=json.dumps(body or {}).encode("utf-8"),
+                                     headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return json.loads(response.read())
+
+
+class OCRSlotLease:
+    """
+    A processor's claim on OCR slots from the scheduler in main.py.
+
+    ``acquire`` returns None when no scheduler is configured or it can't
+    be reached, in which case callers size their pools as before.
+    ``update`` reports pages left and returns the slots the job may use
+    now; if the scheduler stops answering the last allocation is kept.
+    A background thread reports in every OCR_LEASE_HEARTBEAT seconds so
+    the job isn't expired while it works through a long document; if the
+    scheduler expired it anyway, ``update`` registers it again.
+    """
+
+    def __init__(self, job_id, slots, name=OCR_JOB_NAME, wanted=1, remaining=None):
+        self.job_id = job_id
+        self.slots = slots
+        self.name = name
+        self.wanted = wanted
+        self.remaining = remaining
+        self._released = threading.Event()
+        threading.Thread(target=self._heartbeat, name="ocr-lease-heartbeat", daemon=True).start()
+
+    def _heartbeat(self):
+        while not self._released.wait(OCR_LEASE_HEARTBEAT):
+            self.update(None)
+
+    @classmethod
+    def acquire(cls, wanted, remaining=None, name=OCR_JOB_NAME):
+        if not OCR_SCHEDULER_URL:
+            return None
+        try:
+            response = _post("/jobs", {"name": name, "wanted": wanted, "remaining": remaining})
+        except OSError as e:
+            print(f"⚠️  OCR scheduler at {OCR_SCHEDULER_URL} unavailable ({e}); sizing OCR locally")
+            return None
+        print(f"OCR scheduler granted {response['slots']}/{response['total_slots']} CPU slots to {name}")
+        return cls(response["job_id"], response["slots"], name, wanted, remaining)
+
+    def update(self, remaining, wanted=None):
+        if remaining is not None:
+            self.remaining = remaining
+        if wanted is not None:
+            self.wanted = wanted
+        try:
+            self.slots = _post(f"/jobs/{self.job_id}", {"remaining": remaining, "wanted": wanted})["slots"]
+        except urllib.error.HTTPError as e:
+            # The scheduler expired us (or restarted); carry on under a new job id
+            if e.code == 404 and not self._released.is_set():
+                self._register_again()
+        except OSError:
+            pass
+        return self.slots
+
+    def _register_again(self):
+        try:
+            response = _post("/jobs", {"name": self.name, "wanted": self.wanted, "remaining": self.remaining})
+        except OSError:
+            return
+        self.job_id, self.slots = response["job_id"], response["slots"]
+
+    def release(self):
+        self._released.set()
+        try:
+            _post(f"/jobs/{self.job_id}", method="DELETE")
+        except OSError:
+            pass
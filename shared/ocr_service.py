@@ -0,0 +1,309 @@
+"""
+Shared OCR service: one process holds the OCR models and batches pages from every processor.
+
+Start it once, then run the county processors with OCR_SERVICE_SOCKET set:
+
+    python -m shared.ocr_service [--socket PATH] [--max-batch 8] [--max-wait-ms 50]
+    OCR_SERVICE_SOCKET=ocr_service.sock python loudoun/loudoun_pdf_processor.py
+    python -m shared.ocr_service --metrics
+
+Requests from all clients go on one queue. The batcher takes the oldest
+page and waits up to the latency budget (--max-wait-ms) for more, then
+runs up to --max-batch pages through the detector together.
+"""
+import argparse
+import json
+import os
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from shared.ocr_backends import load_image
+from shared.pdf_ocr import OCR_RECOGNITION_BATCH
+from shared.shm_pages import OCR_SHARED_MEMORY, PageBufferPool, SharedPageViews
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_SOCKET_PATH = os.path.join(ROOT, "ocr_service.sock")
+# Processors send pages to the service instead of loading their own models when this is set
+OCR_SERVICE_SOCKET = os.environ.get("OCR_SERVICE_SOCKET")
+# Most pages in one detector batch, and how long the oldest page may wait for others to join it
+OCR_SERVICE_MAX_BATCH = int(os.environ.get("OCR_SERVICE_MAX_BATCH", "8"))
+OCR_SERVICE_MAX_WAIT_MS = float(os.environ.get("OCR_SERVICE_MAX_WAIT_MS", "50"))
+
+_HEADER = struct.Struct("!II")
+
+
+def _send(sock, header, payload=b""):
+    """Write one message: JSON header and raw payload, each length-prefixed"""
+    data = json.dumps(header).encode("utf-8")
+    sock.sendall(_HEADER.pack(len(data), len(payload)) + data)
+    if payload:
+        sock.sendall(payload)
+
+
+def _recv_exact(sock, size):
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    while size:
+        n = sock.recv_into(view, size)
+        if not n:
+            raise ConnectionError("OCR service connection closed")
+        view = view[n:]
+        size -= n
+    return buffer
+
+
+def _recv(sock):
+    """Read one message, returning (header, payload)"""
+    header_len, payload_len = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    header = json.loads(bytes(_recv_exact(sock, header_len)))
+    return header, _recv_exact(sock, payload_len) if payload_len else b""
+
+
+def _results_to_json(results):
+    """readtext output as plain lists so it survives JSON"""
+    return [[[[float(x), float(y)] for x, y in box], text, float(conf)] for box, text, conf in results]
+
+
+class _Request:
+    __slots__ = ("image", "batch_size", "enqueued", "future")
+
+    def __init__(self, image, batch_size):
+        self.image = image
+        self.batch_size = batch_size
+        self.enqueued = time.perf_counter()
+        self.future = Future()
+
+
+class OCRService:
+    """
+    Dynamic batching in front of one OCR reader.
+
+    ``submit`` queues a page and returns a Future of its readtext results.
+    A single batcher thread owns the reader, so the models are loaded and
+    run once for every client.
+    """
+
+    def __init__(self, reader, max_batch=OCR_SERVICE_MAX_BATCH, max_wait_ms=OCR_SERVICE_MAX_WAIT_MS):
+        self.reader = reader
+        self.name = getattr(reader, "name", None) or type(reader).__name__
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000
+        self.queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._stats = {"pages": 0, "batches": 0, "errors": 0, "max_queue_depth": 0,
+                       "queue_wait_ms": 0.0, "ocr_ms": 0.0, "batch_sizes": {}}
+        self._thread = threading.Thread(target=self._run, name="ocr-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, image, batch_size=None):
+        request = _Request(image, batch_size or OCR_RECOGNITION_BATCH)
+        self.queue.put(request)
+        with self._lock:
+            self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], self.queue.qsize())
+        return request.future
+
+    def _next_batch(self):
+        """Block for the oldest page, then take what arrives within its latency budget"""
+        batch = [self.queue.get()]
+        deadline = batch[0].enqueued + self.max_wait
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.perf_counter()
+            try:
+                batch.append(self.queue.get(timeout=timeout) if timeout > 0 else self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            start = time.perf_counter()
+            # Same-sized pages share a readtext_batched call, as in pdf_ocr.ocr_image_pages
+            by_shape = {}
+            for request in batch:
+                by_shape.setdefault(request.image.shape, []).append(request)
+            errors = 0
+            for requests in by_shape.values():
+                batch_size = max(r.batch_size for r in requests)
+                try:
+                    if len(requests) == 1:
+                        results = [self.reader.readtext(requests[0].image, batch_size=batch_size)]
+                    else:
+                        results = self.reader.readtext_batched([r.image for r in requests], batch_size=batch_size)
+                except Exception as e:
+                    errors += len(requests)
+                    for request in requests:
+                        request.future.set_exception(e)
+                    continue
+                for request, result in zip(requests, results):
+                    request.future.set_result(result)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                stats = self._stats
+                stats["pages"] += len(batch)
+                stats["batches"] += 1
+                stats["errors"] += errors
+                stats["ocr_ms"] += elapsed_ms
+                stats["queue_wait_ms"] += sum((start - r.enqueued) * 1000 for r in batch)
+                stats["batch_sizes"][len(batch)] = stats["batch_sizes"].get(len(batch), 0) + 1
+
+    def metrics(self):
+        """Queue depth, batch-size distribution and mean wait/OCR times so far"""
+        with self._lock:
+            stats = dict(self._stats, batch_sizes=dict(sorted(self._stats["batch_sizes"].items())))
+        pages, batches = stats["pages"], stats["batches"]
+        queue_wait_ms, ocr_ms = stats.pop("queue_wait_ms"), stats.pop("ocr_ms")
+        stats["queue_depth"] = self.queue.qsize()
+        stats["mean_batch_size"] = round(pages / batches, 2) if batches else None
+        stats["mean_queue_wait_ms"] = round(queue_wait_ms / pages, 1) if pages else None
+        stats["mean_batch_ocr_ms"] = round(ocr_ms / batches, 1) if batches else None
+        stats["backend"] = self.name
+        return stats
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    """One client connection: requests are answered in order until it disconnects"""
+
+    def handle(self):
+        service = self.server.service
+        # One client process per connection, so its pool's segments stay mapped here between pages
+        views = SharedPageViews()
+        while True:
+            try:
+                header, payload = _recv(self.request)
+            except ConnectionError:
+                return
+            op = header.get("op")
+            try:
+                if op == "hello":
+                    _send(self.request, {"name": service.name})
+                elif op == "metrics":
+                    _send(self.request, service.metrics())
+                elif op == "readtext":
+                    # Each page is queued on its own so it can batch with other clients' pages
+                    if "buffers" in header:
+                        images = [views.attach_page(descriptor) for descriptor in header["buffers"]]
+                    else:
+                        images, offset = [], 0
+                        for shape in header["shapes"]:
+                            size = int(np.prod(shape))
+                            images.append(np.frombuffer(payload, np.uint8, size, offset).reshape(shape))
+                            offset += size
+                    futures = [service.submit(img, header.get("batch_size")) for img in images]
+                    _send(self.request, {"results": [_results_to_json(f.result()) for f in futures]})
+                else:
+                    _send(self.request, {"error": f"unknown op {op!r}"})
+            except Exception as e:
+                _send(self.request, {"error": f"{type(e).__name__}: {e}"})
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(socket_path=DEFAULT_SOCKET_PATH, max_batch=OCR_SERVICE_MAX_BATCH, max_wait_ms=OCR_SERVICE_MAX_WAIT_MS,
+          threads=None):
+    """Load the OCR backend once and serve pages on a Unix socket until interrupted"""
+    from shared.ocr_backends import DEFAULT_OCR_BACKEND, create_backend
+    from shared.ocr_pool import threads_per_worker
+
+    threads = threads or threads_per_worker(1)
+    print(f"Initializing {DEFAULT_OCR_BACKEND} OCR backend ({threads} threads)...")
+    # Always a local backend: OCR_SERVICE_SOCKET may be exported for the processors too
+    service = OCRService(create_backend(DEFAULT_OCR_BACKEND, threads), max_batch, max_wait_ms)
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    server = _Server(socket_path, _Handler)
+    server.service = service
+    print(f"OCR service listening on {socket_path} (batches of up to {service.max_batch} pages, "
+          f"{max_wait_ms:g} ms latency budget)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.remove(socket_path)
+        print(f"OCR service stopped: {json.dumps(service.metrics())}")
+
+
+class OCRServiceClient:
+    """
+    Reader that sends pages to a running OCR service.
+
+    Has the same readtext/readtext_batched calls as the local backends and
+    takes the service backend's ``name``, so OCR cache entries are shared
+    with processors that run the models themselves. Pages are handed over
+    in pooled shared-memory buffers unless OCR_SHARED_MEMORY=0, so only a
+    descriptor goes through the socket.
+    """
+
+    def __init__(self, socket_path=None, shared_memory=OCR_SHARED_MEMORY):
+        self.socket_path = socket_path or OCR_SERVICE_SOCKET or DEFAULT_SOCKET_PATH
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.connect(self.socket_path)
+        self._lock = threading.Lock()
+        self.buffers = PageBufferPool() if shared_memory else None
+        self.name = self._call({"op": "hello"})["name"]
+
+    def _call(self, header, payload=b""):
+        with self._lock:
+            _send(self._sock, header, payload)
+            response, _ = _recv(self._sock)
+        if "error" in response:
+            raise RuntimeError(f"OCR service: {response['error']}")
+        return response
+
+    def readtext_batched(self, images, batch_size=None, **kwargs):
+        images = [np.ascontiguousarray(load_image(img), dtype=np.uint8) for img in images]
+        if self.buffers is None:
+            response = self._call({"op": "readtext", "shapes": [img.shape for img in images],
+                                   "batch_size": batch_size}, b"".join(img.data for img in images))
+        else:
+            with self._lock:
+                descriptors = [self.buffers.put(img) for img in images]
+            try:
+                response = self._call({"op": "readtext", "buffers": descriptors, "batch_size": batch_size})
+            finally:
+                with self._lock:
+                    for descriptor in descriptors:
+                        self.buffers.release(descriptor)
+        return [[(box, text, conf) for box, text, conf in results] for results in response["results"]]
+
+    def readtext(self, img, batch_size=None, **kwargs):
+        return self.readtext_batched([img], batch_size)[0]
+
+    def metrics(self):
+        return self._call({"op": "metrics"})
+
+    def close(self):
+        self._sock.close()
+        if self.buffers is not None:
+            self.buffers.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--socket", default=OCR_SERVICE_SOCKET or DEFAULT_SOCKET_PATH)
+    parser.add_argument("--max-batch", type=int, default=OCR_SERVICE_MAX_BATCH)
+    parser.add_argument("--max-wait-ms", type=float, default=OCR_SERVICE_MAX_WAIT_MS)
+    parser.add_argument("--threads", type=int, help="torch threads for the service (default: all CPUs)")
+    parser.add_argument("--metrics", action="store_true", help="print a running service's metrics and exit")
+    args = parser.parse_args()
+
+    if args.metrics:
+        print(json.dumps(OCRServiceClient(args.socket).metrics(), indent=2))
+        return
+    serve(args.socket, args.max_batch, args.max_wait_ms, args.threads)
+
+
+if __name__ == "__main__":
+    main()
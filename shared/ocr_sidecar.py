@@ -0,0 +1,105 @@
+import json
+import os
+
+# deed_searchable.pdf -> deed.ocr.jsonl next to it
+SIDECAR_SUFFIX = ".ocr.jsonl"
+SIDECAR_VERSION = 1
+
+
+def sidecar_path(pdf_path):
+    """Return the sidecar path for a searchable (or original) PDF path"""
+    base = str(pdf_path)
+    for suffix in ("_searchable.pdf", ".pdf"):
+        if base.endswith(suffix):
+            base = base[:-len(suffix)]
+            break
+    return base + SIDECAR_SUFFIX
+
+
+def ocr_page_record(results):
+    """
+    Build a page record from EasyOCR detail output.
+
+    ``results`` is the list of (box, text, confidence) tuples from readtext;
+    boxes are kept as four [x, y] corners in page pixels and ``conf`` is the
+    mean line confidence (None when nothing was detected).
+    """
+    lines = [
+        {"text": text, "conf": round(float(conf), 4), "box": [[int(x), int(y)] for x, y in box]}
+        for box, text, conf in results
+    ]
+    conf = round(sum(line["conf"] for line in lines) / len(lines), 4) if lines else None
+    return {"source": "ocr", "text": '\n'.join(line["text"] for line in lines), "conf": conf, "lines": lines}
+
+
+def text_layer_record(text):
+    """Build a page record for a page whose text came from the PDF's own text layer"""
+    return {"source": "text_layer", "text": text, "lines": []}
+
+
+def pending_page_record():
+    """Build a placeholder for a page left for later OCR in fields-first mode"""
+    return {"source": "pending", "text": "", "conf": None, "lines": []}
+
+
+def skipped_page_record():
+    """Build a record for a pending page that was never OCR'd because every field was found without it"""
+    return {"source": "skipped", "text": "", "conf": None, "lines": []}
+
+
+def pending_pages(page_records):
+    """Indexes of the pages still waiting for OCR"""
+    return [i for i, record in enumerate(page_records) if record.get("source") == "pending"]
+
+
+def blank_page_record(ink):
+    """Build a page record for a page skipped as blank; ``ink`` is its measured ink fraction"""
+    return {"source": "blank", "text": "", "conf": None, "lines": [], "ink": round(ink, 5)}
+
+
+def write_sidecar(page_records, path, document=None, **header):
+    """
+    Write one JSON line per page after a header line.
+
+    Text is stored as-is (no ASCII folding); the file is written to a
+    temporary name and moved into place so readers never see half of it.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        head = {"version": SIDECAR_VERSION, "document": document, "pages": len(page_records)}
+        head.update(header)
+        f.write(json.dumps(head, ensure_ascii=False) + "\n")
+        for i, record in enumerate(page_records):
+            f.write(json.dumps({"page": i + 1, **record}, ensure_ascii=False) + "\n")
+    os.replace(tmp_path, path)
+
+
+def read_sidecar(path):
+    """Return (header, page records) from a sidecar file"""
+    with open(path, encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f if line.strip()]
+    if not lines:
+        raise ValueError(f"{path} is empty")
+    return lines[0], lines[1:]
+
+
+def sidecar_text(path):
+    """Return the document text from a sidecar, one page after another"""
+    _, pages = read_sidecar(path)
+    return '\n'.join(page.get("text", "") for page in pages)
+
+
+def extract_document_text(pdf_path, read_pdf_text):
+    """
+    Return a document's OCR text from its JSONL sidecar.
+
+    Falls back to ``read_pdf_text(pdf_path)``, the analyzer's own PDF text
+    extraction, when there is no sidecar or it can't be read.
+    """
+    sidecar = sidecar_path(pdf_path)
+    if os.path.exists(sidecar):
+        try:
+            return sidecar_text(sidecar)
+        except (OSError, ValueError) as e:
+            print(f"Error reading sidecar {sidecar}: {e}")
+    return read_pdf_text(pdf_path)
@@ -0,0 +1,178 @@
+import os
+from contextlib import contextmanager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Exported (and quantized) models are written here once and reused by every worker
+ONNX_MODEL_DIR = os.environ.get("OCR_ONNX_DIR", os.path.join(ROOT, "onnx_models"))
+# int8 dynamic quantization of the exported models; set to 0 to run them in float32
+ONNX_QUANTIZE = os.environ.get("OCR_ONNX_QUANTIZE", "1") != "0"
+ONNX_OPSET = 13
+
+# One InferenceSession per model file per process, keyed with the thread count it was made for
+_sessions = {}
+
+
+def _export_detector(detector, path):
+    import torch
+
+    dummy = torch.zeros(1, 3, 640, 640)
+    torch.onnx.export(detector, dummy, path, opset_version=ONNX_OPSET, input_names=["image"],
+                      output_names=["score", "feature"],
+                      dynamic_axes={"image": {0: "batch", 2: "height", 3: "width"},
+                                    "score": {0: "batch", 1: "out_height", 2: "out_width"},
+                                    "feature": {0: "batch", 2: "out_height", 3: "out_width"}})
+
+
+def _export_recognizer(recognizer, img_height, path):
+    import torch
+
+    class _Recognizer(torch.nn.Module):
+        # The CTC models ignore the text argument at inference time
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, image):
+            return self.model(image, None)
+
+    dummy = torch.zeros(1, 1, img_height, 256)
+    torch.onnx.export(_Recognizer(recognizer).eval(), dummy, path, opset_version=ONNX_OPSET,
+                      input_names=["image"], output_names=["preds"],
+                      dynamic_axes={"image": {0: "batch", 3: "width"}, "preds": {0: "batch", 1: "steps"}})
+
+
+def _quantized_path(path):
+    return path.replace(".onnx", ".int8.onnx")
+
+
+@contextmanager
+def _export_lock(model_dir):
+    """Serialize exports across processes; a process that waited finds the finished files"""
+    import fcntl
+
+    os.makedirs(model_dir, exist_ok=True)
+    with open(os.path.join(model_dir, ".export.lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _write_atomically(path, write):
+    """Call ``write`` with a temp path of this process's own and move the result to ``path``"""
+    tmp_path = path.replace(".onnx", f".{os.getpid()}.tmp.onnx")
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _quantize(path, quantized):
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(path, quantized, weight_type=QuantType.QInt8)
+
+
+def model_paths(lang_list=("en",), quantize=ONNX_QUANTIZE, model_dir=ONNX_MODEL_DIR, reader=None):
+    """
+    Export the detector and the recognizer for ``lang_list`` to ONNX if not done yet.
+
+    Returns the (detector, recognizer) model paths, int8-quantized when
+    ``quantize`` is set. Models are exported from ``reader``, or from a
+    torch easyocr.Reader loaded here when a file is missing. Exports hold a
+    lock on ``model_dir`` and only complete files are moved into place, so
+    a process never loads a model another one is still writing.
+    """
+    detector_path = os.path.join(model_dir, "craft_detector.onnx")
+    recognizer_path = os.path.join(model_dir, f"recognizer_{'_'.join(lang_list)}.onnx")
+    paths = (detector_path, recognizer_path)
+    if quantize:
+        paths = tuple(_quantized_path(path) for path in paths)
+    if all(os.path.exists(path) for path in paths):
+        return paths
+
+    with _export_lock(model_dir):
+        if not (os.path.exists(detector_path) and os.path.exists(recognizer_path)) and reader is None:
+            import easyocr
+
+            # Plain float weights: torch's own dynamic quantization doesn't export to ONNX
+            reader = easyocr.Reader(list(lang_list), gpu=False, quantize=False)
+        if not os.path.exists(detector_path):
+            print(f"Exporting EasyOCR detector to {detector_path}...")
+            _write_atomically(detector_path, lambda tmp_path: _export_detector(reader.detector.eval(), tmp_path))
+        if not os.path.exists(recognizer_path):
+            print(f"Exporting EasyOCR recognizer to {recognizer_path}...")
+            _write_atomically(recognizer_path,
+                              lambda tmp_path: _export_recognizer(reader.recognizer.eval(), reader.imgH, tmp_path))
+        if quantize:
+            for path in (detector_path, recognizer_path):
+                if not os.path.exists(_quantized_path(path)):
+                    _write_atomically(_quantized_path(path), lambda tmp_path: _quantize(path, tmp_path))
+    return paths
+
+
+def get_session(path, threads=None):
+    """Return this process's InferenceSession for a model file and thread count, creating it on first use"""
+    session = _sessions.get((path, threads))
+    if session is None:
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+        session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        # A new thread count replaces the model's old session rather than holding the weights twice
+        for key in [key for key in _sessions if key[0] == path]:
+            del _sessions[key]
+        _sessions[path, threads] = session
+    return session
+
+
+class OnnxDetector:
+    """Stands in for EasyOCR's torch CRAFT net: called with an image tensor, returns (score, feature)"""
+
+    def __init__(self, session):
+        self.session = session
+
+    def eval(self):
+        return self
+
+    def __call__(self, x):
+        import torch
+
+        score, feature = self.session.run(None, {"image": x.cpu().numpy()})
+        return torch.from_numpy(score), torch.from_numpy(feature)
+
+
+class OnnxRecognizer:
+    """Stands in for EasyOCR's torch recognizer: called with (image tensor, text), returns CTC logits"""
+
+    def __init__(self, session):
+        self.session = session
+
+    def eval(self):
+        return self
+
+    def __call__(self, image, text=None):
+        import torch
+
+        return torch.from_numpy(self.session.run(None, {"image": image.cpu().numpy()})[0])
+
+
+def use_onnx_models(reader, threads=None, quantize=ONNX_QUANTIZE):
+    """
+    Swap an easyocr.Reader's torch detector and recognizer for ONNX Runtime sessions.
+
+    readtext and readtext_batched keep their pre- and post-processing, so
+    callers don't change. The torch models are released after the swap.
+    """
+    detector_path, recognizer_path = model_paths(reader.lang_list, quantize, reader=reader)
+    reader.detector = OnnxDetector(get_session(detector_path, threads))
+    reader.recognizer = OnnxRecognizer(get_session(recognizer_path, threads))
+    return reader
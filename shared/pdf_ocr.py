@@ -0,0 +1,408 @@
+import os
+import re
+import time
+
+import numpy as np
+from fpdf import FPDF
+from pdf2image import convert_from_path, pdfinfo_from_path
+
+from shared.ocr_cache import get_cache, page_key, reader_settings
+from shared.ocr_sidecar import (blank_page_record, ocr_page_record, pending_page_record, pending_pages, sidecar_path,
+                                text_layer_record, write_sidecar)
+from shared.preprocess import DEFAULT_PREPROCESS, is_blank_page, parse_steps, preprocess_page, unmap_record_boxes
+
+# Upper bound on rasterized page memory held at once, in MB (override with OCR_MAX_RASTER_MB)
+DEFAULT_MAX_RASTER_MB = int(os.environ.get("OCR_MAX_RASTER_MB", "128"))
+
+# Rasterizer used for OCR: "pymupdf" renders in-process, "pdf2image" shells out to poppler
+RASTER_BACKENDS = ("pymupdf", "pdf2image")
+DEFAULT_RASTER_BACKEND = os.environ.get("OCR_RASTER_BACKEND", "pymupdf")
+
+# A page's own text layer is used instead of OCR when it has at least this many characters
+MIN_TEXT_LAYER_CHARS = int(os.environ.get("OCR_MIN_TEXT_LAYER_CHARS", "50"))
+# Pages that are mostly one scanned image need this much text before we trust the layer
+# (recorder stamps and cover labels often add a few lines of text on top of a scan)
+SCANNED_PAGE_MIN_CHARS = 500
+
+# Pages sent through the detector together (same-sized pages only; capped by OCR_MAX_RASTER_MB)
+OCR_PAGE_BATCH = int(os.environ.get("OCR_PAGE_BATCH", "4"))
+# Text regions per recognizer forward pass
+OCR_RECOGNITION_BATCH = int(os.environ.get("OCR_RECOGNITION_BATCH", "32"))
+
+# Fields-first mode: OCR only the first OCR_FIELDS_FIRST_PAGES pages up front and leave the rest
+# for the analyzer to request when a field is still missing (see shared.fields_first). 0 = all pages.
+FIELDS_FIRST_PAGES = int(os.environ.get("OCR_FIELDS_FIRST_PAGES", "0"))
+
+# Adaptive DPI: read pages at OCR_LOW_DPI first and re-read at full DPI only the pages whose
+# mean EasyOCR confidence is under OCR_MIN_CONFIDENCE. Unset/0 keeps a single full-DPI pass.
+DEFAULT_LOW_DPI = int(os.environ.get("OCR_LOW_DPI", "0")) or None
+MIN_PAGE_CONFIDENCE = float(os.environ.get("OCR_MIN_CONFIDENCE", "0.6"))
+
+
+def clean_ocr_text(text):
+    """
+    Clean up OCR text so FPDF's latin-1 core fonts can write it
+    """
+    # Replace common problematic characters with ASCII equivalents
+    text = text.replace('€', 'EUR')
+    text = text.replace('£', 'GBP')
+    text = text.replace('$', 'USD')
+    text = text.replace('°', ' degrees')
+    text = text.replace('±', '+/-')
+    text = text.replace('×', 'x')
+    text = text.replace('÷', '/')
+
+    # Remove any remaining non-ASCII characters
+    text = re.sub(r'[^\x00-\x7F]+', ' ', text)
+
+    # Clean up extra whitespace
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def _page_bytes(page_size, dpi):
+    """Estimate the size of one RGB raster from a pdfinfo 'Page size' value like '612 x 792 pts (letter)'"""
+    match = re.match(r'\s*([\d.]+)\s*x\s*([\d.]+)', page_size or "")
+    width_pts, height_pts = (float(match.group(1)), float(match.group(2))) if match else (612.0, 792.0)
+    return int(width_pts / 72 * dpi) * int(height_pts / 72 * dpi) * 3
+
+
+def _page_windows(page_indexes, window):
+    """Group sorted page indexes into runs of consecutive pages no longer than window"""
+    run = []
+    for i in page_indexes:
+        if run and (i != run[-1] + 1 or len(run) == window):
+            yield run
+            run = []
+        run.append(i)
+    if run:
+        yield run
+
+
+def iter_pdf_pages(pdf_path, dpi=300, max_memory_mb=DEFAULT_MAX_RASTER_MB, page_indexes=None):
+    """
+    Yield (page_index, page_count, PIL image) one page at a time.
+
+    Pages are rasterized in small windows sized so that no more than
+    ``max_memory_mb`` of page images are alive at once, whatever the page count.
+    Only ``page_indexes`` (0-based) are rendered when given.
+    """
+    info = pdfinfo_from_path(pdf_path)
+    page_count = int(info["Pages"])
+    window = max(1, (max_memory_mb * 1024 * 1024) // _page_bytes(info.get("Page size"), dpi))
+    if page_indexes is None:
+        page_indexes = range(page_count)
+
+    for run in _page_windows(sorted(page_indexes), window):
+        pages = convert_from_path(pdf_path, dpi, first_page=run[0] + 1, last_page=run[-1] + 1)
+        for offset in range(len(pages)):
+            # Hand the page over and drop our reference so it is freed once the caller is done
+            page, pages[offset] = pages[offset], None
+            yield run[0] + offset, page_count, page
+        del pages
+
+
+def iter_pdf_pages_pymupdf(pdf_path, dpi=300, page_indexes=None):
+    """
+    Yield (page_index, page_count, RGB array) rendered in-process by PyMuPDF.
+
+    Each array is a zero-copy view of the page's pixmap buffer and is only
+    valid until the next page is requested; copy it to keep it longer.
+    """
+    import fitz  # PyMuPDF
+
+    doc = fitz.open(pdf_path)
+    try:
+        page_count = doc.page_count
+        for i in (range(page_count) if page_indexes is None else sorted(page_indexes)):
+            pix = doc[i].get_pixmap(dpi=dpi, colorspace=fitz.csRGB, alpha=False)
+            samples = pix.samples_mv if hasattr(pix, "samples_mv") else pix.samples
+            yield i, page_count, np.frombuffer(samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+            # Release the view before the pixmap it points into
+            del samples
+            pix = None
+    finally:
+        doc.close()
+
+
+def iter_pdf_page_arrays(pdf_path, dpi=300, backend=DEFAULT_RASTER_BACKEND,
+                         max_memory_mb=DEFAULT_MAX_RASTER_MB, page_indexes=None):
+    """Yield (page_index, page_count, RGB array) for each page using the selected rasterizer"""
+    if backend not in RASTER_BACKENDS:
+        raise ValueError(f"Unknown raster backend {backend!r}, expected one of {RASTER_BACKENDS}")
+    if backend == "pymupdf":
+        yield from iter_pdf_pages_pymupdf(pdf_path, dpi, page_indexes)
+    else:
+        for i, page_count, page in iter_pdf_pages(pdf_path, dpi, max_memory_mb, page_indexes):
+            yield i, page_count, np.asarray(page)
+
+
+def page_text_layer(page, min_chars=MIN_TEXT_LAYER_CHARS):
+    """Return a PyMuPDF page's extractable text if it is usable in place of OCR, else None"""
+    import fitz  # PyMuPDF
+
+    text = page.get_text().strip()
+    if len(text) < min_chars:
+        return None
+    # A full-page scan with only a stamp or label as real text still needs OCR
+    page_area = abs(page.rect)
+    image_area = sum(abs(fitz.Rect(info["bbox"]) & page.rect) for info in page.get_image_info())
+    if page_area and image_area > 0.8 * page_area and len(text) < SCANNED_PAGE_MIN_CHARS:
+        return None
+    return text
+
+
+def read_text_layers(pdf_path, min_chars=MIN_TEXT_LAYER_CHARS):
+    """Return one entry per page: its usable text layer, or None if the page needs OCR"""
+    import fitz  # PyMuPDF
+
+    doc = fitz.open(pdf_path)
+    try:
+        return [page_text_layer(page, min_chars) for page in doc]
+    finally:
+        doc.close()
+
+
+def ocr_image_page(reader, img_array, batch_size=OCR_RECOGNITION_BATCH):
+    """OCR one page image into a page record with text, boxes and confidences"""
+    return ocr_page_record(reader.readtext(img_array, batch_size=batch_size))
+
+
+def ocr_image_pages(reader, images, batch_size=OCR_RECOGNITION_BATCH):
+    """
+    OCR several page images, returning one page record per image.
+
+    Same-sized pages go through the detector together via readtext_batched;
+    recognition runs ``batch_size`` text regions per forward pass.
+    """
+    records = [None] * len(images)
+    by_shape = {}
+    for idx, img in enumerate(images):
+        by_shape.setdefault(img.shape, []).append(idx)
+    for idxs in by_shape.values():
+        if len(idxs) == 1:
+            records[idxs[0]] = ocr_image_page(reader, images[idxs[0]], batch_size)
+            continue
+        batch_results = reader.readtext_batched([images[i] for i in idxs], batch_size=batch_size)
+        for idx, results in zip(idxs, batch_results):
+            records[idx] = ocr_page_record(results)
+    return records
+
+
+def ocr_image_text(reader, img_array, batch_size=OCR_RECOGNITION_BATCH):
+    """OCR one page image and join the detected text lines"""
+    return ocr_image_page(reader, img_array, batch_size)["text"]
+
+
+def ocr_image_texts(reader, images, batch_size=OCR_RECOGNITION_BATCH):
+    """OCR several page images, returning one text per image"""
+    return [record["text"] for record in ocr_image_pages(reader, images, batch_size)]
+
+
+def iter_page_batches(pages, page_batch=OCR_PAGE_BATCH, max_memory_mb=DEFAULT_MAX_RASTER_MB):
+    """
+    Group (page_index, page_count, image) items into lists of at most ``page_batch``.
+
+    The batch is shrunk so the held images stay under ``max_memory_mb``.
+    Images are copied when batched because PyMuPDF arrays are only valid
+    until the next page is rendered.
+    """
+    batch = []
+    limit = page_batch
+    for i, page_count, img in pages:
+        if not batch:
+            limit = max(1, min(page_batch, (max_memory_mb * 1024 * 1024) // max(1, img.nbytes)))
+        if limit == 1:
+            yield [(i, page_count, img)]
+            continue
+        batch.append((i, page_count, img.copy()))
+        if len(batch) >= limit:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def needs_rescan(record, min_confidence=MIN_PAGE_CONFIDENCE):
+    """True if a low-DPI read found no text or its mean confidence is under min_confidence"""
+    if record.get("source") == "blank":
+        return False
+    return record.get("conf") is None or record["conf"] < min_confidence
+
+
+def _ocr_batches(pdf_path, page_indexes, reader, dpi, raster_backend, max_memory_mb, page_batch, batch_size,
+                 preprocess):
+    steps = parse_steps(preprocess)
+    cache = get_cache()
+    settings = reader_settings(reader, steps)
+    pages = iter_pdf_page_arrays(pdf_path, dpi, raster_backend, max_memory_mb, page_indexes)
+    for batch in iter_page_batches(pages, page_batch, max_memory_mb):
+        records = [None] * len(batch)
+        keys = [None] * len(batch)
+        ocr_slots, images, transforms, timings = [], [], [], []
+        for slot, (i, _, img) in enumerate(batch):
+            # A cheap ink check keeps separator pages and empty backs away from the OCR model
+            blank, ink = is_blank_page(img)
+            if blank:
+                print(f"  Skipping blank page {i + 1} of {os.path.basename(str(pdf_path))} ({ink:.2%} ink)")
+                records[slot] = blank_page_record(ink)
+                continue
+            # Same pixels and settings as a page seen before: reuse its result
+            if cache is not None:
+                keys[slot] = page_key(img, settings)
+                records[slot] = cache.get(keys[slot])
+                if records[slot] is not None:
+                    continue
+            page_timings = {}
+            img, transform = preprocess_page(img, steps, page_timings)
+            ocr_slots.append(slot)
+            images.append(img)
+            transforms.append(transform)
+            timings.append(page_timings)
+        if images:
+            start = time.perf_counter()
+            ocr_records = ocr_image_pages(reader, images, batch_size)
+            ocr_ms = (time.perf_counter() - start) * 1000 / len(images)
+            for slot, record, transform, page_timings in zip(ocr_slots, ocr_records, transforms, timings):
+                # Boxes in the sidecar always refer to the page as rendered at this DPI
+                unmap_record_boxes(record, transform)
+                if cache is not None:
+                    cache.put(keys[slot], record)
+                record.update(ocr_ms=round(ocr_ms, 1),
+                              preprocess_ms={step: round(ms, 1) for step, ms in page_timings.items()})
+                records[slot] = record
+        for record in records:
+            record["dpi"] = dpi
+        yield [(i, page_count, record) for (i, page_count, _), record in zip(batch, records)]
+        del batch, images
+
+
+def iter_ocr_batches(pdf_path, page_indexes, reader, dpi=300, raster_backend=DEFAULT_RASTER_BACKEND,
+                     max_memory_mb=DEFAULT_MAX_RASTER_MB, page_batch=OCR_PAGE_BATCH,
+                     batch_size=OCR_RECOGNITION_BATCH, low_dpi=DEFAULT_LOW_DPI, min_confidence=MIN_PAGE_CONFIDENCE,
+                     preprocess=DEFAULT_PREPROCESS):
+    """
+    Yield lists of (page_index, page_count, record) as each batch of pages is OCR'd.
+
+    Each page goes through the ``preprocess`` steps (see shared.preprocess)
+    before readtext. With ``low_dpi`` the pages are read at that resolution
+    first; pages for which needs_rescan is true are then re-rasterized at
+    ``dpi`` and yielded a second time (marked ``rescanned``), replacing the
+    low-resolution read.
+    """
+    first_dpi = low_dpi if low_dpi and low_dpi < dpi else dpi
+    rescan = []
+    for batch in _ocr_batches(pdf_path, page_indexes, reader, first_dpi, raster_backend, max_memory_mb,
+                              page_batch, batch_size, preprocess):
+        yield batch
+        if first_dpi != dpi:
+            rescan.extend(i for i, _, record in batch if needs_rescan(record, min_confidence))
+    if not rescan:
+        return
+    for batch in _ocr_batches(pdf_path, rescan, reader, dpi, raster_backend, max_memory_mb, page_batch, batch_size,
+                              preprocess):
+        for _, _, record in batch:
+            record["rescanned"] = True
+        yield batch
+
+
+def ocr_pdf_pages(pdf_path, page_indexes, reader, dpi=300, raster_backend=DEFAULT_RASTER_BACKEND,
+                  page_batch=OCR_PAGE_BATCH, batch_size=OCR_RECOGNITION_BATCH, low_dpi=DEFAULT_LOW_DPI,
+                  min_confidence=MIN_PAGE_CONFIDENCE):
+    """Rasterize and OCR some pages of a PDF, returning their page records in page_indexes order"""
+    records = {}
+    for batch in iter_ocr_batches(pdf_path, page_indexes, reader, dpi, raster_backend, page_batch=page_batch,
+                                  batch_size=batch_size, low_dpi=low_dpi, min_confidence=min_confidence):
+        for i, _, record in batch:
+            records[i] = record
+    missing = [i for i in page_indexes if i not in records]
+    if missing:
+        raise ValueError(f"{pdf_path} has no page {missing[0] + 1}")
+    return [records[i] for i in page_indexes]
+
+
+def write_searchable_pdf(page_texts, output_pdf_path):
+    """Write one FPDF page per page of text"""
+    pdf = FPDF()
+    for text in page_texts:
+        pdf.add_page()
+        pdf.set_auto_page_break(auto=True, margin=15)
+        pdf.set_font("Arial", size=12)
+        pdf.multi_cell(0, 10, clean_ocr_text(text))
+    pdf.output(output_pdf_path)
+
+
+def plan_page_records(pdf_path, first_pages=FIELDS_FIRST_PAGES):
+    """
+    Return (page records, OCR page indexes) for a document.
+
+    Text-layer pages are filled in and pages to OCR now are left as None.
+    With ``first_pages`` only that many leading pages are OCR'd now; later
+    pages without a text layer get a pending placeholder.
+    """
+    records = [text_layer_record(text) if text is not None else None for text in read_text_layers(pdf_path)]
+    if first_pages:
+        for i in range(first_pages, len(records)):
+            if records[i] is None:
+                records[i] = pending_page_record()
+    return records, [i for i, record in enumerate(records) if record is None]
+
+
+def write_ocr_outputs(page_records, input_pdf_path, output_pdf_path):
+    """
+    Write the searchable PDF and its JSONL sidecar for one document.
+
+    When pages are still pending, the sidecar header lists them along with
+    the original PDF (relative to the sidecar) so they can be OCR'd later.
+    """
+    write_searchable_pdf([record["text"] for record in page_records], output_pdf_path)
+    sidecar = sidecar_path(output_pdf_path)
+    header = {}
+    pending = pending_pages(page_records)
+    if pending:
+        header = {"pending": pending, "source_pdf": os.path.relpath(str(input_pdf_path), os.path.dirname(sidecar))}
+    write_sidecar(page_records, sidecar, document=os.path.basename(str(input_pdf_path)), **header)
+
+
+def add_page_stats(stats, page_records):
+    """Add a document's page counts to a stats dict"""
+    if stats is not None:
+        stats["pages"] = stats.get("pages", 0) + len(page_records)
+        stats["text_layer_pages"] = stats.get("text_layer_pages", 0) + sum(
+            1 for record in page_records if record.get("source") == "text_layer")
+        stats["pending_pages"] = stats.get("pending_pages", 0) + len(pending_pages(page_records))
+        stats["rescanned_pages"] = stats.get("rescanned_pages", 0) + sum(
+            1 for record in page_records if record.get("rescanned"))
+        stats["blank_pages"] = stats.get("blank_pages", 0) + sum(
+            1 for record in page_records if record.get("source") == "blank")
+        stats["cached_pages"] = stats.get("cached_pages", 0) + sum(
+            1 for record in page_records if record.get("cached"))
+        for record in page_records:
+            if "ocr_ms" in record:
+                stats["ocr_ms"] = stats.get("ocr_ms", 0) + record["ocr_ms"]
+            for step, ms in record.get("preprocess_ms", {}).items():
+                stats[f"preprocess_{step}_ms"] = stats.get(f"preprocess_{step}_ms", 0) + ms
+
+
+def print_ocr_stats(stats):
+    """Print the page totals that run_ocr_jobs collects per document (merge them with ocr_pool.merge_stats)"""
+    pages = stats.get("pages", 0)
+    print(f"Pages processed: {pages}")
+    print(f"Pages taken from an existing text layer (OCR skipped): {stats.get('text_layer_pages', 0)}/{pages}")
+    if stats.get("rescanned_pages"):
+        print(f"Pages re-read at full DPI after a low-confidence first pass: {stats['rescanned_pages']}/{pages}")
+    if stats.get("pending_pages"):
+        print(f"Pages left for on-demand OCR (fields-first): {stats['pending_pages']}/{pages}")
+    if stats.get("blank_pages"):
+        print(f"Blank pages skipped (OCR skipped): {stats['blank_pages']}/{pages}")
+    ocr_pages = pages - sum(stats.get(key, 0) for key in ("text_layer_pages", "blank_pages", "pending_pages"))
+    cache = get_cache()
+    if cache is not None:
+        m = cache.metrics()
+        print(f"OCR cache: {stats.get('cached_pages', 0)}/{ocr_pages} pages served from cache, "
+              f"{m['entries']} entries ({m['size_mb']}/{m['max_mb']} MB) in {m['path']}")
+    ocr_pages -= stats.get("cached_pages", 0)
+    if ocr_pages and stats.get("ocr_ms"):
+        print(f"Average OCR time per page: {stats['ocr_ms'] / ocr_pages:.0f} ms")
+        for key in sorted(k for k in stats if k.startswith("preprocess_")):
+            step = key[len("preprocess_"):-len("_ms")]
+            print(f"  Preprocess {step}: {stats[key] / ocr_pages:.1f} ms/page")
@@ -0,0 +1,224 @@
+import os
+import time
+
+import numpy as np
+
+# Steps run in this order; OCR_PREPROCESS picks which ones (comma separated). Off by default until
+# benchmarks/bench_preprocess.py shows a win: cropping gives every page its own shape, which stops
+# same-sized pages from sharing a readtext_batched call.
+PREPROCESS_STEPS = ("grayscale", "crop", "deskew", "binarize", "downscale")
+DEFAULT_PREPROCESS = os.environ.get("OCR_PREPROCESS", "")
+
+# Pixels darker than this count as ink when finding margins and skew
+INK_THRESHOLD = 200
+# White border kept around the content after cropping, in pixels
+CROP_PADDING = 16
+# Skew corrections outside this range are more likely layout than a tilted scan
+MAX_DESKEW_DEGREES = 10.0
+MIN_DESKEW_DEGREES = 0.2
+# Longest side after the downscale step
+DOWNSCALE_MAX_SIDE = int(os.environ.get("OCR_DOWNSCALE_MAX_SIDE", "2400"))
+
+# Pages with less ink than this fraction of their area (inside the edge band) skip OCR; 0 disables.
+# A single short line (an APN or an address) is about 0.0003 at 300 DPI, so keep this below it
+BLANK_INK_RATIO = float(os.environ.get("OCR_BLANK_INK_RATIO", "0.0002"))
+# Ink must be at least this much darker than the page's background, so a toned scan isn't all ink
+BLANK_MIN_CONTRAST = float(os.environ.get("OCR_BLANK_MIN_CONTRAST", "40"))
+# Edge band ignored by the blank check: scanner shadows and punch holes live there
+BLANK_EDGE_FRACTION = 0.03
+# Unbroken vertical ink runs at least this fraction of the page height are barcode bars or rules,
+# not text, and don't count as ink; a cover sheet with only a barcode is then blank
+BLANK_BAR_MIN_HEIGHT = 0.025
+
+
+def parse_steps(steps):
+    """Turn 'grayscale,crop' (or a list) into a validated tuple of step names in run order"""
+    if isinstance(steps, str):
+        steps = [s.strip() for s in steps.split(",")]
+    steps = {s for s in steps if s}
+    unknown = steps - set(PREPROCESS_STEPS)
+    if unknown:
+        raise ValueError(f"Unknown preprocessing steps {sorted(unknown)}, expected some of {PREPROCESS_STEPS}")
+    return tuple(s for s in PREPROCESS_STEPS if s in steps)
+
+
+def _gray(img):
+    import cv2
+
+    return cv2.cvtColor(img, cv2.COLOR_RGB2GRAY) if img.ndim == 3 else img
+
+
+def _ink_mask(img):
+    return _gray(img) < INK_THRESHOLD
+
+
+def _translation(dx, dy):
+    return np.array([[1.0, 0.0, dx], [0.0, 1.0, dy], [0.0, 0.0, 1.0]])
+
+
+def _long_vertical_runs(mask, length):
+    """Pixels of ``mask`` that lie in an unbroken vertical run at least ``length`` long"""
+    height = mask.shape[0]
+    if length < 2 or height < length:
+        return np.zeros_like(mask)
+    zeros = np.zeros((1, mask.shape[1]), np.int32)
+    counts = np.vstack([zeros, np.cumsum(mask, axis=0, dtype=np.int32)])
+    # Windows of ``length`` rows that are all ink, then every pixel one of them covers
+    full = (counts[length:] - counts[:-length]) == length
+    covered = np.vstack([zeros, np.cumsum(full, axis=0, dtype=np.int32)])
+    rows = np.arange(height)
+    first = np.clip(rows - length + 1, 0, None)
+    last = np.minimum(rows + 1, len(full))
+    return (covered[last] - covered[first]) > 0
+
+
+def _isolated(mask):
+    """Pixels of ``mask`` with no neighbour above, below or to either side also in it"""
+    neighbours = np.zeros_like(mask)
+    neighbours[1:] |= mask[:-1]
+    neighbours[:-1] |= mask[1:]
+    neighbours[:, 1:] |= mask[:, :-1]
+    neighbours[:, :-1] |= mask[:, 1:]
+    return mask & ~neighbours
+
+
+def page_ink_ratio(img, stride=4, min_contrast=BLANK_MIN_CONTRAST):
+    """
+    Fraction of a page that is ink.
+
+    Works on every ``stride``-th pixel with the edge band trimmed, so it
+    costs a tiny fraction of an OCR pass. Ink is darker than INK_THRESHOLD
+    and ``min_contrast`` below the page's median tone. Isolated samples
+    (scanner dust; text strokes span several samples), barcode bars and
+    vertical rules (see BLANK_BAR_MIN_HEIGHT) are not counted.
+    """
+    sample = img[::stride, ::stride]
+    if sample.ndim == 3:
+        sample = sample.mean(axis=2)
+    height, width = sample.shape
+    dy, dx = int(height * BLANK_EDGE_FRACTION), int(width * BLANK_EDGE_FRACTION)
+    sample = sample[dy:height - dy, dx:width - dx]
+    if not sample.size:
+        return 0.0
+    ink = sample < min(INK_THRESHOLD, np.median(sample) - min_contrast)
+    ink &= ~_isolated(ink)
+    ink &= ~_long_vertical_runs(ink, int(sample.shape[0] * BLANK_BAR_MIN_HEIGHT))
+    return float(np.count_nonzero(ink)) / sample.size
+
+
+def is_blank_page(img, ink_ratio=BLANK_INK_RATIO):
+    """Return (blank, ink) for a page: blank when it has almost no ink against its own background"""
+    ink = page_ink_ratio(img)
+    return bool(ink_ratio) and ink < ink_ratio, ink
+
+
+def grayscale(img):
+    """Single-channel copy of an RGB page"""
+    return _gray(img), None
+
+
+def crop_margins(img, padding=CROP_PADDING):
+    """
+    Crop the page to the rows and columns that contain ink, plus padding.
+
+    Rows/columns with only a few dark pixels (scanner dust) don't count.
+    """
+    mask = _ink_mask(img)
+    height, width = mask.shape
+    rows = np.flatnonzero(np.count_nonzero(mask, axis=1) > max(1, width // 500))
+    cols = np.flatnonzero(np.count_nonzero(mask, axis=0) > max(1, height // 500))
+    if not len(rows) or not len(cols):
+        return img, None
+    top, bottom = max(0, rows[0] - padding), min(height, rows[-1] + padding + 1)
+    left, right = max(0, cols[0] - padding), min(width, cols[-1] + padding + 1)
+    return img[top:bottom, left:right], _translation(-left, -top)
+
+
+def estimate_skew(img):
+    """Angle in degrees that would straighten the page's ink, from its minimum-area rectangle"""
+    import cv2
+
+    points = cv2.findNonZero(_ink_mask(img).astype(np.uint8))
+    if points is None or len(points) < 100:
+        return 0.0
+    angle = cv2.minAreaRect(points)[2]
+    # OpenCV < 4.5 reports [-90, 0), newer versions (0, 90]
+    if angle > 45:
+        angle -= 90
+    elif angle < -45:
+        angle += 90
+    return angle
+
+
+def deskew(img, max_degrees=MAX_DESKEW_DEGREES):
+    """Rotate a slightly tilted scan back to horizontal"""
+    import cv2
+
+    angle = estimate_skew(img)
+    if abs(angle) < MIN_DESKEW_DEGREES or abs(angle) > max_degrees:
+        return img, None
+    height, width = img.shape[:2]
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+    border = 255 if img.ndim == 2 else (255,) * img.shape[2]
+    rotated = cv2.warpAffine(img, matrix, (width, height), flags=cv2.INTER_LINEAR,
+                             borderMode=cv2.BORDER_CONSTANT, borderValue=border)
+    return rotated, np.vstack([matrix, [0.0, 0.0, 1.0]])
+
+
+def binarize(img):
+    """Adaptive (local) threshold so uneven scans and faint stamps become clean black on white"""
+    import cv2
+
+    return cv2.adaptiveThreshold(_gray(img), 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 31, 15), None
+
+
+def downscale(img, max_side=DOWNSCALE_MAX_SIDE):
+    """Shrink the page so its longest side is at most max_side"""
+    import cv2
+
+    height, width = img.shape[:2]
+    scale = max_side / max(height, width)
+    if scale >= 1:
+        return img, None
+    resized = cv2.resize(img, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+    return resized, np.diag([scale, scale, 1.0])
+
+
+_STEP_FUNCTIONS = {
+    "grayscale": grayscale,
+    "crop": crop_margins,
+    "deskew": deskew,
+    "binarize": binarize,
+    "downscale": downscale,
+}
+
+
+def preprocess_page(img, steps=DEFAULT_PREPROCESS, timings=None):
+    """
+    Run the selected steps on one page image.
+
+    Returns (image, transform) where transform is the 3x3 matrix taking
+    original page pixels to preprocessed pixels, so OCR boxes can be mapped
+    back with unmap_record_boxes. Milliseconds per step are added to
+    ``timings`` when a dict is given.
+    """
+    transform = np.eye(3)
+    for step in parse_steps(steps):
+        start = time.perf_counter()
+        img, matrix = _STEP_FUNCTIONS[step](img)
+        if matrix is not None:
+            transform = matrix @ transform
+        if timings is not None:
+            timings[step] = timings.get(step, 0.0) + (time.perf_counter() - start) * 1000
+    return img, transform
+
+
+def unmap_record_boxes(record, transform):
+    """Map a page record's boxes from preprocessed pixels back to the original page"""
+    if transform is None or np.allclose(transform, np.eye(3)):
+        return record
+    inverse = np.linalg.inv(transform)
+    for line in record.get("lines", []):
+        points = np.hstack([np.array(line["box"], dtype=float), np.ones((len(line["box"]), 1))])
+        line["box"] = [[int(round(x)), int(round(y))] for x, y, _ in points @ inverse.T]
+    return record
@@ -0,0 +1,261 @@
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+# HTTP status codes that mean "slow down" rather than "this request is wrong"
+BACKOFF_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class _Latency:
+    """Smoothed and best latency of one kind of action on a host"""
+
+    __slots__ = ("ewma", "best")
+
+    def __init__(self):
+        self.ewma = None
+        self.best = None
+
+
+class HostLimiter:
+    """
+    AIMD concurrency and rate controller for a single host.
+
+    The concurrency limit grows by roughly one slot per window of healthy
+    responses and is cut multiplicatively on 429/5xx, exceptions or when the
+    smoothed latency rises well above the best latency seen so far. The
+    minimum spacing between request starts follows the same rules.
+
+    Latency is tracked per kind of action (a click, a page load, a row
+    open that waits for the viewer), since their normal durations differ
+    by orders of magnitude; a kind is only compared with itself. Actions
+    with no kind, such as downloads whose time follows the file size,
+    don't feed the latency signal at all.
+    """
+
+    def __init__(self, host, initial_limit=2, min_limit=1, max_limit=8,
+                 min_interval=0.0, max_interval=10.0, backoff_factor=0.5,
+                 latency_tolerance=2.0, min_latency_delta=0.05, ewma_alpha=0.2):
+        self.host = host
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = float(initial_limit)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self.backoff_factor = backoff_factor
+        self.latency_tolerance = latency_tolerance
+        self.min_latency_delta = min_latency_delta
+        self.ewma_alpha = ewma_alpha
+
+        self.in_flight = 0
+        self._latency = {}
+        self.successes = 0
+        self.errors = 0
+        self.backoffs = 0
+        self._last_start = 0.0
+        self._last_backoff = 0.0
+        self._blocked_until = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        """Block until a slot is free and the minimum interval has passed"""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                ready_at = max(self._last_start + self.interval, self._blocked_until)
+                if self.in_flight < int(self.limit) and now >= ready_at:
+                    self.in_flight += 1
+                    self._last_start = now
+                    return now
+                timeout = ready_at - now if now < ready_at else None
+                self._cond.wait(timeout)
+
+    def release(self, started_at, status_code=None, error=None, retry_after=None, kind="request"):
+        """Release a slot and feed the outcome of a ``kind`` of action into the controller"""
+        latency = time.monotonic() - started_at
+        with self._cond:
+            self.in_flight -= 1
+            state = self._latency.setdefault(kind, _Latency()) if kind else None
+            if error is not None or status_code in BACKOFF_STATUS_CODES:
+                self.errors += 1
+                self._back_off(state, retry_after)
+            else:
+                self.successes += 1
+                if state:
+                    self._observe_latency(state, latency)
+                if state and self._latency_is_rising(state):
+                    self._back_off(state)
+                else:
+                    self._increase()
+            self._cond.notify_all()
+
+    def _observe_latency(self, state, latency):
+        if state.ewma is None:
+            state.ewma = latency
+        else:
+            state.ewma += self.ewma_alpha * (latency - state.ewma)
+        if state.best is None or latency < state.best:
+            state.best = latency
+
+    def _latency_is_rising(self, state):
+        if state.ewma is None or state.best is None:
+            return False
+        # Ignore jitter on very fast responses; only sustained slowdowns count
+        if state.ewma - state.best < self.min_latency_delta:
+            return False
+        return state.ewma > state.best * self.latency_tolerance
+
+    def _increase(self):
+        # Additive increase: about +1 slot per `limit` healthy responses
+        self.limit = min(self.max_limit, self.limit + 1.0 / max(self.limit, 1.0))
+        self.interval = max(self.min_interval, self.interval * 0.9)
+
+    def _back_off(self, state=None, retry_after=None):
+        # Multiplicative decrease of concurrency, widen the spacing between requests.
+        # Only cut once per latency window so a burst of failures from requests
+        # that were already in flight doesn't collapse the limit to the floor.
+        now = time.monotonic()
+        if retry_after:
+            self._blocked_until = now + min(retry_after, self.max_interval * 6)
+        if now - self._last_backoff < ((state and state.ewma) or 1.0):
+            return
+        self._last_backoff = now
+        self.backoffs += 1
+        self.limit = max(self.min_limit, self.limit * self.backoff_factor)
+        self.interval = min(self.max_interval, max(self.interval * 2, 0.25))
+        # Let the baseline drift up so one fast outlier doesn't pin us down forever
+        if state and state.best is not None and state.ewma is not None:
+            state.best = (state.best + state.ewma) / 2
+
+    @contextmanager
+    def slot(self, kind="request"):
+        """
+        Context manager around one request or browser action.
+
+        The yielded dict may be filled with ``status_code`` and ``retry_after``
+        so the controller can react to them; exceptions count as errors.
+        ``kind`` names the latency class of the action (None: not timed).
+        """
+        started_at = self.acquire()
+        outcome = {}
+        try:
+            yield outcome
+        except Exception as e:
+            self.release(started_at, error=e, kind=kind)
+            raise
+        else:
+            self.release(started_at, outcome.get("status_code"),
+                         retry_after=outcome.get("retry_after"), kind=kind)
+
+    def metrics(self):
+        """Return the current limits and counters for this host"""
+        with self._cond:
+            return {
+                "host": self.host,
+                "concurrency_limit": int(self.limit),
+                "in_flight": self.in_flight,
+                "min_interval_s": round(self.interval, 3),
+                "latency_s": {kind: {"ewma": round(state.ewma, 3), "best": round(state.best, 3)}
+                              for kind, state in self._latency.items() if state.ewma is not None},
+                "successes": self.successes,
+                "errors": self.errors,
+                "backoffs": self.backoffs,
+            }
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def host_of(url_or_host):
+    """Return the host part of a URL, or the argument itself if it is already a host"""
+    parsed = urlparse(url_or_host)
+    return parsed.netloc or url_or_host
+
+
+def get_limiter(url_or_host, **kwargs):
+    """Return the process-wide limiter for a host, creating it on first use"""
+    host = host_of(url_or_host)
+    with _limiters_lock:
+        limiter = _limiters.get(host)
+        if limiter is None:
+            limiter = HostLimiter(host, **kwargs)
+            _limiters[host] = limiter
+        return limiter
+
+
+def _retry_after_seconds(response):
+    value = response.headers.get("Retry-After")
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+def limited_request(session, method, url, **kwargs):
+    """Issue a requests call through the limiter for the URL's host"""
+    with get_limiter(url).slot() as outcome:
+        response = session.request(method, url, **kwargs)
+        outcome["status_code"] = response.status_code
+        outcome["retry_after"] = _retry_after_seconds(response)
+        return response
+
+
+def limited_get(session, url, **kwargs):
+    """GET through the per-host limiter"""
+    return limited_request(session, "GET", url, **kwargs)
+
+
+@contextmanager
+def limited_stream(session, url, method="GET", **kwargs):
+    """
+    Streamed request that holds its limiter slot until the body is read.
+
+    Use as ``with limited_stream(session, url) as response:``. The slot is
+    released and the response closed when the block exits, so downloads
+    count against the host's concurrency. Their duration follows the file
+    size, so it isn't used as a latency signal; errors and 429/5xx still are.
+    """
+    with get_limiter(url).slot(kind=None) as outcome:
+        response = session.request(method, url, stream=True, **kwargs)
+        outcome["status_code"] = response.status_code
+        outcome["retry_after"] = _retry_after_seconds(response)
+        with response:
+            yield response
+
+
+@contextmanager
+def browser_action(driver, url=None, kind="click"):
+    """
+    Run a browser action that hits the server through the limiter.
+
+    The host is taken from ``url`` when given, otherwise from the page the
+    driver is currently on. Give actions that also wait for something slow
+    (a page load, the document viewer) their own ``kind`` so they are not
+    compared with quick clicks.
+    """
+    host = host_of(url) if url else host_of(driver.current_url)
+    with get_limiter(host).slot(kind) as outcome:
+        yield outcome
+
+
+def limited_driver_get(driver, url):
+    """Navigate the browser to a URL through the limiter"""
+    with browser_action(driver, url, kind="navigate"):
+        driver.get(url)
+
+
+def all_metrics():
+    """Return metrics for every host seen by this process"""
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return [limiter.metrics() for limiter in limiters]
+
+
+def print_metrics():
+    """Print a one-line summary per host"""
+    for m in all_metrics():
+        latency = " ".join(f"{kind}={state['ewma']}s" for kind, state in m["latency_s"].items()) or "-"
+        print(f"📊 {m['host']}: limit={m['concurrency_limit']} interval={m['min_interval_s']}s "
+              f"latency[{latency}] ok={m['successes']} err={m['errors']} backoffs={m['backoffs']}")
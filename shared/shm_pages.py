@@ -0,0 +1,105 @@
+import os
+from collections import OrderedDict
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+# Hand pages to the OCR service through shared memory instead of the socket; 0 sends the pixels inline
+OCR_SHARED_MEMORY = os.environ.get("OCR_SHARED_MEMORY", "1") != "0"
+# Free page buffers kept for reuse per process; a 300 DPI letter page is about 25 MB in RGB
+SHM_POOL_BUFFERS = int(os.environ.get("OCR_SHM_POOL_BUFFERS", "8"))
+# Segments are rounded up to this so slightly different page sizes reuse the same buffer
+_SEGMENT_ROUND = 1024 * 1024
+
+
+def page_descriptor(shm, img):
+    """What crosses the process boundary instead of the pixels"""
+    return {"name": shm.name, "shape": list(img.shape), "dtype": img.dtype.str}
+
+
+class PageBufferPool:
+    """
+    Reusable shared-memory buffers for page images.
+
+    ``put`` copies a page into a free segment (or a new one) and returns a
+    small descriptor; the receiving process maps the same memory with
+    ``attach_page``. ``release`` returns the segment to the pool once the
+    receiver is done with it. Segments are unlinked by ``close``.
+    """
+
+    def __init__(self, max_free=SHM_POOL_BUFFERS):
+        self.max_free = max_free
+        self._free = []
+        self._in_use = {}
+        self.allocated = 0
+        self.reused = 0
+
+    def _acquire(self, nbytes):
+        # Smallest free segment that fits
+        fits = [shm for shm in self._free if shm.size >= nbytes]
+        if fits:
+            shm = min(fits, key=lambda s: s.size)
+            self._free.remove(shm)
+            self.reused += 1
+        else:
+            size = -(-nbytes // _SEGMENT_ROUND) * _SEGMENT_ROUND
+            shm = shared_memory.SharedMemory(create=True, size=max(size, _SEGMENT_ROUND))
+            self.allocated += 1
+        self._in_use[shm.name] = shm
+        return shm
+
+    def put(self, img):
+        """Copy a page into shared memory and return its descriptor"""
+        img = np.asarray(img)
+        shm = self._acquire(img.nbytes)
+        np.ndarray(img.shape, img.dtype, buffer=shm.buf)[...] = img
+        return page_descriptor(shm, img)
+
+    def release(self, descriptor):
+        """Give a page's buffer back to the pool"""
+        shm = self._in_use.pop(descriptor["name"])
+        self._free.append(shm)
+        # Keep the largest buffers; they fit any page
+        while len(self._free) > self.max_free:
+            smallest = min(self._free, key=lambda s: s.size)
+            self._free.remove(smallest)
+            smallest.close()
+            smallest.unlink()
+
+    def close(self):
+        for shm in self._free + list(self._in_use.values()):
+            shm.close()
+            shm.unlink()
+        self._free = []
+        self._in_use = {}
+
+
+class SharedPageViews:
+    """
+    Receiver side: map page descriptors to arrays without copying.
+
+    Pools reuse their segments, so mappings are kept (up to ``max_open``)
+    and a page in a known segment costs no system calls.
+    """
+
+    def __init__(self, max_open=4 * SHM_POOL_BUFFERS):
+        self.max_open = max_open
+        self._open = OrderedDict()
+
+    def attach_page(self, descriptor):
+        """An array over the page a descriptor names (valid until the sender releases it)"""
+        name = descriptor["name"]
+        shm = self._open.pop(name, None)
+        if shm is None:
+            shm = shared_memory.SharedMemory(name=name)
+            # The sender owns the segment; without this the tracker would unlink it when we exit
+            resource_tracker.unregister(shm._name, "shared_memory")
+        self._open[name] = shm
+        while len(self._open) > self.max_open:
+            _, old = self._open.popitem(last=False)
+            try:
+                old.close()
+            except BufferError:
+                # An array over it is still alive; the mapping goes when that does
+                pass
+        return np.ndarray(descriptor["shape"], np.dtype(descriptor["dtype"]), buffer=shm.buf)
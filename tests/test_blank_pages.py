@@ -0,0 +1,97 @@
+"""Blank-page check on synthetic 300 DPI letter pages"""
+import numpy as np
+import pytest
+
+from shared.preprocess import is_blank_page, page_ink_ratio
+
+HEIGHT, WIDTH = 3300, 2550
+
+
+def white_page():
+    return np.full((HEIGHT, WIDTH, 3), 255, np.uint8)
+
+
+def draw_text_lines(page, lines, top=400, chars=60):
+    """Glyph-sized strokes laid out like lines of 12 pt text"""
+    rng = np.random.default_rng(1)
+    for line in range(lines):
+        y = top + line * 60
+        for char in range(chars):
+            x = 300 + char * 30
+            # Two strokes per glyph: a stem and a bar
+            stem = rng.integers(20, 34)
+            page[y + 34 - stem:y + 34, x:x + 4] = 0
+            page[y + 16:y + 20, x:x + 18] = 0
+    return page
+
+
+def draw_barcode(page, top=300, left=800, bar_height=150):
+    """A cover-sheet barcode: about half an inch tall, a couple of inches wide"""
+    rng = np.random.default_rng(2)
+    x = left
+    for _ in range(40):
+        width = int(rng.integers(3, 10))
+        page[top:top + bar_height, x:x + width] = 0
+        x += width + int(rng.integers(3, 10))
+    return page
+
+
+def test_white_page_is_blank():
+    assert is_blank_page(white_page())[0]
+
+
+def test_dust_and_scanner_noise_is_blank():
+    rng = np.random.default_rng(0)
+    page = (255 - rng.integers(0, 12, (HEIGHT, WIDTH, 1))).astype(np.uint8).repeat(3, axis=2)
+    specks = rng.integers(0, [HEIGHT, WIDTH], (400, 2))
+    for y, x in specks:
+        page[y:y + 3, x:x + 3] = 40
+    assert is_blank_page(page)[0]
+
+
+def toned_page():
+    # Darker than the ink threshold everywhere, but one even tone
+    rng = np.random.default_rng(0)
+    return (180 + rng.integers(-3, 4, (HEIGHT, WIDTH, 1))).astype(np.uint8).repeat(3, axis=2)
+
+
+def test_uniformly_toned_page_is_blank():
+    assert is_blank_page(toned_page())[0]
+
+
+def test_text_on_a_toned_page_is_not_blank():
+    assert not is_blank_page(draw_text_lines(toned_page(), lines=1, chars=15))[0]
+
+
+@pytest.mark.parametrize("lines, chars", [(1, 15), (1, 60), (2, 60), (4, 30), (5, 20), (3, 60)])
+def test_sparse_text_page_is_not_blank(lines, chars):
+    # (1, 15) is a last page holding only an APN or an address line
+    page = draw_text_lines(white_page(), lines=lines, chars=chars)
+    assert not is_blank_page(page)[0]
+
+
+def test_barcode_only_cover_sheet_is_blank():
+    page = draw_barcode(white_page())
+    raw_ink = np.count_nonzero(page[..., 0] < 200) / (HEIGHT * WIDTH)
+    assert raw_ink > 0.004
+    blank, ink = is_blank_page(page)
+    assert blank
+    assert ink < 0.001
+
+
+def test_barcode_with_text_is_not_blank():
+    page = draw_text_lines(draw_barcode(white_page()), lines=3, top=900)
+    assert not is_blank_page(page)[0]
+
+
+def test_zero_ratio_disables_the_check():
+    assert not is_blank_page(white_page(), ink_ratio=0)[0]
+
+
+@pytest.mark.parametrize("stride", [1, 4])
+def test_edge_band_is_ignored(stride):
+    page = white_page()
+    # Scanner shadow down the left edge and punch holes along the top
+    page[:, :40] = 30
+    page[20:60, 500:2000:300] = 0
+    assert page_ink_ratio(page, stride) == 0
@@ -0,0 +1,41 @@
+"""Fields-first cleanup once the analysis no longer needs the pending pages"""
+import os
+
+import pytest
+
+pytest.importorskip("fpdf")
+pytest.importorskip("pdf2image")
+
+from shared.fields_first import analyze_document, finish_pending_pages, has_pending_pages
+from shared.ocr_sidecar import pending_page_record, read_sidecar, write_sidecar
+
+FOUND = {"date": "03/15/2024", "owner_name": "SMITH JOHN", "address": "1 MAIN ST", "apn_taxid": "123456789"}
+
+
+def fields_first_document(tmp_path):
+    """A sidecar with page 1 OCR'd and pages 2-3 pending, plus the original they would come from"""
+    original = tmp_path / "deed.pdf"
+    original.write_bytes(b"%PDF-1.4")
+    pages = [{"source": "ocr", "text": "DEED OF TRUST", "conf": 0.9, "lines": []},
+             pending_page_record(), pending_page_record()]
+    write_sidecar(pages, str(tmp_path / "deed.ocr.jsonl"), document="deed.pdf", pending=[1, 2],
+                  source_pdf="deed.pdf")
+    return str(tmp_path / "deed_searchable.pdf"), original
+
+
+def test_finish_pending_pages_deletes_the_original(tmp_path):
+    pdf_path, original = fields_first_document(tmp_path)
+    finish_pending_pages(pdf_path)
+    assert not original.exists()
+    assert not has_pending_pages(pdf_path)
+    header, pages = read_sidecar(str(tmp_path / "deed.ocr.jsonl"))
+    assert [page["source"] for page in pages] == ["ocr", "skipped", "skipped"]
+    assert header["document"] == "deed.pdf"
+
+
+def test_analysis_that_finds_every_field_releases_the_pending_pages(tmp_path):
+    pdf_path, original = fields_first_document(tmp_path)
+    result = analyze_document("DEED OF TRUST", pdf_path, lambda text: dict(FOUND))
+    assert result == FOUND
+    assert not original.exists()
+    assert not os.path.exists(str(tmp_path / "deed.ocr.jsonl.tmp"))
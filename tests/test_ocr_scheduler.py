@@ -0,0 +1,45 @@
+"""OCRSlotScheduler shares, expiry of silent jobs and cleanup by job name"""
+import pytest
+
+from shared import ocr_scheduler
+from shared.ocr_scheduler import OCRSlotScheduler
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ocr_scheduler.time, "time", lambda: now[0])
+    return now
+
+
+def test_concurrent_jobs_split_the_slots(clock):
+    scheduler = OCRSlotScheduler(total_slots=8)
+    first, _ = scheduler.register("loudoun", wanted=8)
+    second, _ = scheduler.register("fairfax", wanted=8)
+    assert scheduler.update(first) == 4
+    assert scheduler.update(second) == 4
+
+
+def test_silent_job_expires_and_frees_its_slots(clock):
+    scheduler = OCRSlotScheduler(total_slots=8, job_timeout=60)
+    dead, _ = scheduler.register("loudoun", wanted=8)
+    alive, slots = scheduler.register("fairfax", wanted=8)
+    assert slots == 4
+    clock[0] += 30
+    scheduler.update(alive)
+    clock[0] += 45
+    # The first job hasn't reported for 75 s; the second did 45 s ago
+    assert scheduler.update(alive) == 8
+    assert [job["id"] for job in scheduler.status()["jobs"]] == [alive]
+    with pytest.raises(KeyError):
+        scheduler.update(dead)
+
+
+def test_release_name_drops_every_job_of_a_script(clock):
+    scheduler = OCRSlotScheduler(total_slots=8)
+    scheduler.register("loudoun", wanted=8)
+    scheduler.register("loudoun", wanted=2)
+    other, _ = scheduler.register("pwcba", wanted=8)
+    assert scheduler.release_name("loudoun") == 2
+    assert scheduler.update(other) == 8
+    assert scheduler.release_name("loudoun") == 0
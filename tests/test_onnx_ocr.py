@@ -0,0 +1,64 @@
+"""ONNX Runtime EasyOCR: atomic model writes, and parity with the PyTorch reader"""
+import difflib
+import os
+
+import numpy as np
+import pytest
+
+from shared.onnx_ocr import _write_atomically
+
+SAMPLE_TEXT = ["DEED OF TRUST", "INSTRUMENT 2024001234", "RECORDED 03/15/2024", "PARCEL 123-45-6789"]
+
+
+def test_write_atomically_moves_complete_file_into_place(tmp_path):
+    path = str(tmp_path / "model.onnx")
+
+    def write(partial_path):
+        assert partial_path != path and not os.path.exists(path)
+        with open(partial_path, "wb") as f:
+            f.write(b"model")
+
+    _write_atomically(path, write)
+    assert open(path, "rb").read() == b"model"
+    assert os.listdir(tmp_path) == ["model.onnx"]
+
+
+def test_write_atomically_leaves_nothing_when_the_write_fails(tmp_path):
+    path = str(tmp_path / "model.onnx")
+
+    def write(partial_path):
+        with open(partial_path, "wb") as f:
+            f.write(b"half a mod")
+        raise RuntimeError("export failed")
+
+    with pytest.raises(RuntimeError):
+        _write_atomically(path, write)
+    assert os.listdir(tmp_path) == []
+
+
+def synthetic_page():
+    """A white 300 DPI letter page with a few lines of deed-like text"""
+    cv2 = pytest.importorskip("cv2")
+    page = np.full((3300, 2550, 3), 255, np.uint8)
+    for i, line in enumerate(SAMPLE_TEXT):
+        cv2.putText(page, line, (250, 400 + i * 200), cv2.FONT_HERSHEY_SIMPLEX, 3, (0, 0, 0), 6)
+    return page
+
+
+@pytest.mark.parametrize("quantize", [False, True], ids=["fp32", "int8"])
+def test_onnx_matches_pytorch(quantize):
+    pytest.importorskip("easyocr")
+    pytest.importorskip("onnxruntime")
+    from benchmarks.bench_onnx import detector_max_diff
+    from shared.ocr_backends import EasyOCRBackend, EasyOCROnnxBackend
+    from shared.pdf_ocr import ocr_image_text
+
+    page = synthetic_page()
+    torch_backend = EasyOCRBackend()
+    onnx_backend = EasyOCROnnxBackend(quantize=quantize)
+    expected = ocr_image_text(torch_backend, page)
+    actual = ocr_image_text(onnx_backend, page)
+    # Same gate as benchmarks/bench_onnx.py --min-similarity
+    assert difflib.SequenceMatcher(None, expected, actual).ratio() >= 0.97
+    if not quantize:
+        assert detector_max_diff(torch_backend, onnx_backend, page) < 1e-3
@@ -0,0 +1,53 @@
+"""HostLimiter's reaction to healthy mixes of fast and slow actions, and to real slowdowns"""
+import pytest
+
+from shared import rate_control
+from shared.rate_control import HostLimiter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rate_control.time, "monotonic", lambda: now[0])
+    return now
+
+
+def run(limiter, clock, pattern, rows=40):
+    """Feed ``rows`` repetitions of (kind, seconds) actions that all return 200"""
+    for _ in range(rows):
+        for kind, seconds in pattern:
+            started_at = clock[0]
+            clock[0] += seconds
+            limiter.release(started_at, 200, kind=kind)
+            clock[0] += limiter.interval
+
+
+def test_row_open_and_click_mix_does_not_back_off(clock):
+    # Loudoun: opening a row waits for the viewer, the save click is quick
+    limiter = HostLimiter("loudoun")
+    run(limiter, clock, [("open_row", 3.0), ("click", 0.1)])
+    assert limiter.backoffs == 0
+    assert limiter.interval == limiter.min_interval
+
+
+def test_click_and_download_mix_does_not_back_off(clock):
+    # Fairfax: quick clicks, then a download whose time follows the file size
+    limiter = HostLimiter("fairfax")
+    run(limiter, clock, [("click", 0.05), (None, 1.5)])
+    assert limiter.backoffs == 0
+
+
+def test_rising_latency_within_a_kind_backs_off(clock):
+    limiter = HostLimiter("slow")
+    run(limiter, clock, [("click", 0.1)], rows=10)
+    run(limiter, clock, [("click", 1.0)], rows=10)
+    assert limiter.backoffs > 0
+
+
+def test_server_errors_back_off(clock):
+    limiter = HostLimiter("errors")
+    started_at = clock[0]
+    clock[0] += 0.2
+    limiter.release(started_at, 503, kind="click")
+    assert limiter.backoffs == 1
+    assert limiter.limit < 2